@@ -1,3 +1,12 @@
-from .pyngeso import NgEso
-
 __version__ = "0.3.8"
+
+__all__ = ["NgEso"]
+
+
+def __getattr__(name: str):
+    # NgEso is imported on first access so that `import pyngeso` stays cheap
+    if name == "NgEso":
+        from .pyngeso import NgEso
+
+        return NgEso
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
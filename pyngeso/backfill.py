@@ -0,0 +1,330 @@
+import json
+import logging
+import os
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from .compression import write_compressed
+from .exceptions import IncompleteWindow
+from .pyngeso import NgEso
+from .records import response_records, response_result
+
+logger = logging.getLogger("PyNgEso")
+
+Window = Tuple[Union[date, datetime], Union[date, datetime]]
+
+
+def date_windows(
+    start_date: Union[date, datetime],
+    end_date: Union[date, datetime],
+    window_days: int,
+) -> List[Window]:
+    """
+    Split a range into consecutive half-open windows [window_start, window_end) of at
+    most `window_days` days, each window ending where the next one starts. With dates
+    the range covers the whole of `end_date`, with datetimes it stops at `end_date`.
+    Query a window with `window_query` so that rows between midnight of a window's last
+    day and the start of the next window are not lost on timestamp columns.
+    """
+    if window_days < 1:
+        raise ValueError("window_days should be a positive integer")
+    NgEso.validate_date_range(start_date, end_date)
+    if not isinstance(end_date, datetime):
+        end_date = end_date + timedelta(days=1)
+
+    windows = []
+    window_start = start_date
+    while window_start < end_date:
+        window_end = min(window_start + timedelta(days=window_days), end_date)
+        windows.append((window_start, window_end))
+        window_start = window_end
+    return windows
+
+
+def window_query(
+    date_col: str, window: Window, filters: Optional[List[str]] = None
+) -> Dict:
+    """
+    Keyword arguments for `NgEso.query` selecting the rows of the half-open `window`,
+    i.e. `date_col` >= window_start and `date_col` < window_end
+    """
+    window_start, window_end = window
+    end = NgEso.datetime_to_str(window_end)
+    return {
+        "date_col": date_col,
+        "start_date": window_start,
+        "filters": [f"\"{date_col}\" < '{end}'::timestamp"] + list(filters or []),
+    }
+
+
+def window_name(resource: str, window: Window) -> str:
+    """Name of the files holding a window of a resource, e.g. in `file_sink`"""
+    window_start, window_end = window
+    return f"{resource}_{window_start:%Y%m%d}_{window_end:%Y%m%d}"
+
+
+def _parse_window_bound(value: str) -> Union[date, datetime]:
+    if "T" in value:
+        return datetime.fromisoformat(value)
+    return date.fromisoformat(value)
+
+
+def file_sink(
+    directory: str, resource: str, suffix: str = ".json.gz"
+) -> Callable[[date, date, bytes], None]:
+    """
+    Sink for `BackfillJob` writing the payload of every window of `resource` to its own
+    file in `directory` (see `window_name`), compressed according to `suffix` (see
+    `compression.open_compressed`). Files are written to a temporary path first and
+    moved into place, so a retried window replaces rather than corrupts an earlier
+    attempt.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    def sink(window_start: date, window_end: date, content: bytes) -> None:
+        name = window_name(resource, (window_start, window_end))
+        path = os.path.join(directory, name + suffix)
+        write_compressed(path + ".tmp" + suffix, content)
+        os.replace(path + ".tmp" + suffix, path)
+
+    return sink
+
+
+class BackfillJob:
+    """
+    A restartable backfill of a resource over a date range.
+
+    The range is split into windows which are queried one at a time. The outcome of
+    every window (row count, attempts, last error) is persisted in a SQLite state file
+    so that re-running the job only fetches the windows that have not completed yet.
+
+    Args:
+        client (NgEso): client for the resource being backfilled
+        date_col (str): column used to split the range into windows
+        start_date (date or datetime): start of the backfill (inclusive)
+        end_date (date or datetime): last date of the backfill (inclusive) or, given
+            as a datetime, end of the backfill (exclusive)
+        state_path (str): path of the SQLite file holding the job state
+        window_days (int): number of days fetched per request
+        sink (callable): called with (window_start, window_end, content) for every
+            successful window, window_end being exclusive; it should overwrite rather
+            than append so that a window retried after a crash is not persisted twice
+        fields (list): fields passed through to `NgEso.query`
+        filters (list): filters passed through to `NgEso.query`
+        expected_rows (callable): optional, returns the number of rows expected for
+            (window_start, window_end); a mismatch marks the window as failed
+        max_attempts (int): number of attempts after which a window is given up on
+    """
+
+    def __init__(
+        self,
+        client: NgEso,
+        date_col: str,
+        start_date: Union[date, datetime],
+        end_date: Union[date, datetime],
+        state_path: str,
+        window_days: int = 30,
+        sink: Optional[Callable[[date, date, bytes], None]] = None,
+        fields: Optional[List[str]] = None,
+        filters: Optional[List[str]] = None,
+        expected_rows: Optional[Callable[[date, date], int]] = None,
+        max_attempts: int = 3,
+    ):
+        self.client = client
+        self.date_col = date_col
+        self.windows = date_windows(start_date, end_date, window_days)
+        self.state_path = state_path
+        self.sink = sink
+        self.fields = fields
+        self.filters = filters
+        self.expected_rows = expected_rows
+        self.max_attempts = max_attempts
+
+        self.job_id = self.construct_job_id()
+        self._init_state()
+
+    def construct_job_id(self) -> str:
+        """Identify the job by what it queries so that one state file can hold many"""
+        return json.dumps(
+            [self.client.resource, self.date_col, self.fields, self.filters]
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.state_path)
+
+    def _init_state(self) -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "create table if not exists windows ("
+                    "job text not null, "
+                    "window_start text not null, "
+                    "window_end text not null, "
+                    "status text not null, "
+                    "rows integer, "
+                    "attempts integer not null, "
+                    "error text, "
+                    "updated_at text not null, "
+                    "primary key (job, window_start, window_end))"
+                )
+                conn.executemany(
+                    "insert or ignore into windows values (?, ?, ?, 'pending', null, "
+                    "0, null, ?)",
+                    [
+                        (self.job_id, start.isoformat(), end.isoformat(), self._now())
+                        for start, end in self.windows
+                    ],
+                )
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+    def state(self) -> Dict[Window, Dict]:
+        """Return the persisted state of every window of the job"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "select window_start, window_end, status, rows, attempts, error "
+                "from windows where job = ?",
+                (self.job_id,),
+            ).fetchall()
+        finally:
+            conn.close()
+
+        job_windows = set(self.windows)
+        windows = {}
+        for window_start, window_end, status, n_rows, attempts, error in rows:
+            window = (_parse_window_bound(window_start), _parse_window_bound(window_end))
+            if window not in job_windows:
+                continue
+            windows[window] = {
+                "status": status,
+                "rows": n_rows,
+                "attempts": attempts,
+                "error": error,
+            }
+        return windows
+
+    def pending_windows(self) -> List[Window]:
+        """Windows not yet completed which still have attempts left"""
+        state = self.state()
+        return [
+            window
+            for window in self.windows
+            if state[window]["status"] != "completed"
+            and state[window]["attempts"] < self.max_attempts
+        ]
+
+    def failed_windows(self) -> List[Window]:
+        """Windows which have exhausted their attempts"""
+        state = self.state()
+        return [
+            window
+            for window in self.windows
+            if state[window]["status"] == "failed"
+            and state[window]["attempts"] >= self.max_attempts
+        ]
+
+    def reset_failed(self) -> None:
+        """Give windows which have exhausted their attempts a fresh set of attempts"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "update windows set attempts = 0, updated_at = ? "
+                    "where job = ? and status = 'failed'",
+                    (self._now(), self.job_id),
+                )
+        finally:
+            conn.close()
+
+    def run(self) -> None:
+        """Fetch every pending window, recording its outcome as it goes"""
+        pending = self.pending_windows()
+        logger.info(
+            f"Backfilling {self.client.resource}: {len(pending)}/{len(self.windows)} "
+            "windows pending"
+        )
+        for window_start, window_end in pending:
+            self.run_window(window_start, window_end)
+
+        failed = self.failed_windows()
+        if failed:
+            logger.error(
+                f"Backfilling {self.client.resource}: {len(failed)} windows failed "
+                f"after {self.max_attempts} attempts"
+            )
+
+    def run_window(self, window_start: date, window_end: date) -> None:
+        try:
+            content = self.client.query(
+                fields=self.fields,
+                **window_query(self.date_col, (window_start, window_end), self.filters),
+            )
+            n_rows = self.verify_rows(window_start, window_end, content)
+            if self.sink is not None:
+                self.sink(window_start, window_end, content)
+        except Exception as e:
+            # any failure is recorded against the window so that the job can be resumed
+            # and max_attempts is honoured
+            logger.warning(
+                f"Backfilling {self.client.resource} [{window_start}, {window_end}] "
+                f"failed: {e}"
+            )
+            self._record(window_start, window_end, "failed", None, str(e))
+            return
+
+        self._record(window_start, window_end, "completed", n_rows, None)
+
+    def verify_rows(self, window_start: date, window_end: date, content: bytes) -> int:
+        """
+        Count the records of a window's response, raising if the request failed, the
+        records were truncated by the API's row limit or do not match the expected
+        number of rows
+        """
+        rb = json.loads(content)
+        if not rb.get("success"):
+            raise IncompleteWindow(f"request failed: {rb.get('error')}")
+        n_rows = len(response_records(rb))
+        if response_result(rb).get("records_truncated"):
+            raise IncompleteWindow(
+                f"records truncated at {n_rows} rows, use a smaller window_days"
+            )
+        if self.expected_rows is not None:
+            expected = self.expected_rows(window_start, window_end)
+            if n_rows != expected:
+                raise IncompleteWindow(f"expected {expected} rows, got {n_rows}")
+        return n_rows
+
+    def _record(
+        self,
+        window_start: date,
+        window_end: date,
+        status: str,
+        n_rows: Optional[int],
+        error: Optional[str],
+    ) -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "update windows set status = ?, rows = ?, attempts = attempts + 1, "
+                    "error = ?, updated_at = ? "
+                    "where job = ? and window_start = ? and window_end = ?",
+                    (
+                        status,
+                        n_rows,
+                        error,
+                        self._now(),
+                        self.job_id,
+                        window_start.isoformat(),
+                        window_end.isoformat(),
+                    ),
+                )
+        finally:
+            conn.close()
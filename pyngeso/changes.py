@@ -0,0 +1,130 @@
+import hashlib
+import json
+from typing import (
+    AbstractSet,
+    Dict,
+    Hashable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from .records import response_records
+
+Key = Tuple
+
+# the datastore's internal row id changes whenever a resource is reloaded
+default_ignore = ("_id",)
+
+
+def _canonical(obj) -> bytes:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode()
+
+
+def _digest(records: List[Dict], ignore: AbstractSet[str]) -> str:
+    rows = [
+        {col: val for col, val in record.items() if col not in ignore}
+        for record in records
+    ]
+    return hashlib.sha256(_canonical(rows)).hexdigest()
+
+
+def records_digest(content: bytes, ignore: Sequence[str] = default_ignore) -> str:
+    """Hash the records of a response, ignoring the rest of its body and `ignore`"""
+    return _digest(response_records(content), set(ignore))
+
+
+class RecordDiff(NamedTuple):
+    """
+    Rows added, changed or removed since the previous fetch of a window. Added and
+    changed rows are the records as returned by the API, removed rows are reported by
+    their primary key.
+    """
+
+    added: List[Dict]
+    changed: List[Dict]
+    removed: List[Key]
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+class _WindowState(NamedTuple):
+    digest: str
+    rows: Dict[Key, bytes]
+
+
+class ChangeTracker:
+    """
+    Track the records of repeated fetches and report what changed between them.
+
+    Every fetch is compared with the previous fetch of the same window, so a tracker can
+    follow several windows (e.g. one per delivery day) at once. A digest of the whole
+    window is checked first, so unchanged responses are not compared row by row.
+
+    Args:
+        primary_key (list): columns identifying a row, e.g. ["orderId"]
+        ignore (list): columns left out of the row digests, e.g. the datastore's
+            internal `_id` which changes when a resource is reloaded
+    """
+
+    def __init__(
+        self, primary_key: Sequence[str], ignore: Sequence[str] = default_ignore
+    ):
+        if not primary_key:
+            raise ValueError("At least one primary key column should be provided")
+        self.primary_key = list(primary_key)
+        self.ignore = set(ignore)
+        self._windows: Dict[Hashable, _WindowState] = {}
+
+    def key(self, record: Dict) -> Key:
+        return tuple(record.get(col) for col in self.primary_key)
+
+    def row_digest(self, record: Dict) -> bytes:
+        row = {col: val for col, val in record.items() if col not in self.ignore}
+        return hashlib.blake2b(_canonical(row), digest_size=16).digest()
+
+    def window_digest(self, records: List[Dict]) -> str:
+        return _digest(records, self.ignore)
+
+    def diff(self, content: bytes, window: Optional[Hashable] = None) -> RecordDiff:
+        """
+        Compare the records of a `NgEso.query` response with the previous response for
+        the same window and remember them for the next call. The first fetch of a
+        window reports every row as added.
+        """
+        return self.diff_records(response_records(content), window)
+
+    def diff_records(
+        self, records: List[Dict], window: Optional[Hashable] = None
+    ) -> RecordDiff:
+        previous = self._windows.get(window)
+        digest = self.window_digest(records)
+        if previous is not None and previous.digest == digest:
+            return RecordDiff([], [], [])
+
+        rows: Dict[Key, bytes] = {}
+        added, changed = [], []
+        previous_rows = previous.rows if previous is not None else {}
+        for record in records:
+            key = self.key(record)
+            if key in rows:
+                raise ValueError(
+                    f"Duplicate primary key {key} for columns {self.primary_key}"
+                )
+            rows[key] = self.row_digest(record)
+            if key not in previous_rows:
+                added.append(record)
+            elif previous_rows[key] != rows[key]:
+                changed.append(record)
+        removed = [key for key in previous_rows if key not in rows]
+
+        self._windows[window] = _WindowState(digest, rows)
+        return RecordDiff(added, changed, removed)
+
+    def forget(self, window: Optional[Hashable] = None) -> None:
+        """Drop the state of a window, e.g. once it can no longer change"""
+        self._windows.pop(window, None)
@@ -0,0 +1,39 @@
+import gzip
+from typing import IO
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+gzip_suffix = ".gz"
+zstd_suffix = ".zst"
+
+
+def open_compressed(path: str, mode: str = "rb", **kwargs) -> IO:
+    """
+    Open a file, transparently (de)compressing it according to its suffix: `.gz` for
+    gzip, `.zst` for zstandard (requires the `zstandard` package) and anything else as
+    an uncompressed file. Extra keyword arguments (e.g. newline) are passed on to the
+    underlying open function for text modes.
+    """
+    if path.endswith(gzip_suffix):
+        return gzip.open(path, mode, **kwargs)
+    if path.endswith(zstd_suffix):
+        if zstandard is None:
+            raise ImportError(
+                f"zstandard is required to read or write {zstd_suffix} files: "
+                "pip install pyngeso[zstd]"
+            )
+        return zstandard.open(path, mode, **kwargs)
+    return open(path, mode, **kwargs)
+
+
+def write_compressed(path: str, content: bytes) -> None:
+    with open_compressed(path, "wb") as f:
+        f.write(content)
+
+
+def read_compressed(path: str) -> bytes:
+    with open_compressed(path, "rb") as f:
+        return f.read()
@@ -1,2 +1,19 @@
 class UnsuccessfulRequest(Exception):
     pass
+
+
+class IncompleteWindow(Exception):
+    pass
+
+
+class IncompleteFetch(Exception):
+    """
+    Raised by `pipeline.fetch_and_convert` when some windows failed; the windows
+    converted before the failure are kept in `converted` and the errors of the failed
+    windows in `failed`.
+    """
+
+    def __init__(self, message: str, converted: list, failed: dict):
+        super().__init__(message)
+        self.converted = converted
+        self.failed = failed
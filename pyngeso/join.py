@@ -0,0 +1,165 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from functools import reduce
+from typing import Dict, List, Literal, NamedTuple, Optional, Sequence, Tuple, Union
+
+from .backfill import window_query
+from .pyngeso import NgEso
+from .records import response_records
+from .settlement import (
+    local_midnight,
+    np,
+    period_seconds,
+    settlement_period_start,
+    settlement_window,
+    to_settlement_periods,
+)
+
+
+class Source(NamedTuple):
+    """
+    A resource to align on settlement periods.
+
+    Rows are keyed on (date_col, period_col) when `period_col` is given, e.g.
+    SETTLEMENT_DATE and SETTLEMENT_PERIOD, otherwise on the settlement period containing
+    the UTC timestamp in `date_col`.
+    """
+
+    client: NgEso
+    date_col: str
+    value_cols: Sequence[str]
+    period_col: Optional[str] = None
+    filters: Optional[List[str]] = None
+
+
+class AlignedSeries(NamedTuple):
+    start: np.ndarray  # datetime64[s], UTC start of each period
+    settlement_date: np.ndarray  # datetime64[D]
+    settlement_period: np.ndarray  # int64
+    values: Dict[str, Dict[str, np.ndarray]]  # source name -> column -> values
+
+
+def _utc_range(
+    start_date: Union[date, datetime], end_date: Union[date, datetime]
+) -> Tuple[np.datetime64, np.datetime64]:
+    """UTC [start, end) of a range of whole settlement days or of UTC timestamps"""
+    if isinstance(start_date, datetime):
+        start = np.datetime64(start_date, "s")
+    else:
+        start = local_midnight(start_date)[()]
+    if isinstance(end_date, datetime):
+        end = np.datetime64(end_date, "s")
+    else:
+        end = local_midnight(np.datetime64(end_date, "D") + 1)[()]
+    if end <= start:
+        raise ValueError("end_date should be after start_date")
+    return start, end
+
+
+def _fetch_columns(
+    source: Source, start: np.datetime64, end: np.datetime64
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Fetch a source and return its period keys, sorted, with its value columns"""
+    key_cols = [source.date_col] + ([source.period_col] if source.period_col else [])
+    fields = key_cols + list(source.value_cols)
+    if source.period_col:
+        content = source.client.query(
+            fields=fields,
+            date_col=source.date_col,
+            filters=source.filters,
+            period_col=source.period_col,
+            **settlement_window(start, end),
+        )
+    else:
+        window = (start.astype(datetime), end.astype(datetime))
+        content = source.client.query(
+            fields=fields, **window_query(source.date_col, window, source.filters)
+        )
+    records = response_records(content)
+
+    timestamps = np.array(
+        [record[source.date_col] for record in records], dtype="datetime64[s]"
+    )
+    if source.period_col:
+        periods = np.array([record[source.period_col] for record in records], "int64")
+        timestamps = settlement_period_start(timestamps.astype("datetime64[D]"), periods)
+    keys = timestamps.astype("int64") // period_seconds
+
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    if keys.size and (np.diff(keys) == 0).any():
+        raise ValueError(
+            f"{source.client.resource} has several rows per settlement period, "
+            "narrow it down with filters"
+        )
+    columns = {
+        col: np.array([record.get(col) for record in records], "float64")[order]
+        for col in source.value_cols
+    }
+    return keys, columns
+
+
+def fetch_aligned(
+    sources: Dict[str, Source],
+    start_date: Union[date, datetime],
+    end_date: Union[date, datetime],
+    how: Literal["inner", "left", "outer"] = "inner",
+    max_threads: Optional[int] = None,
+) -> AlignedSeries:
+    """
+    Fetch several resources over the same window concurrently and align their value
+    columns on settlement periods.
+
+    Every source is queried for the same UTC range: sources keyed on settlement date
+    and period for the settlement periods it covers (see `settlement_window`), sources
+    keyed on a timestamp for `date_col` >= start and `date_col` < end.
+
+    Every source is reduced to a sorted array of period keys and float64 value columns,
+    which are then merged with binary searches rather than row by row.
+
+    Args:
+        sources (dict): name of each source to its `Source`
+        start_date: first settlement day of the window, or its UTC start as a datetime
+        end_date: last settlement day of the window (inclusive), or its UTC end
+            (exclusive) as a datetime
+        how (str): "inner" keeps the periods found in every source, "left" those of the
+            first source and "outer" those of any source; values of periods missing
+            from a source are NaN
+        max_threads (int): number of resources fetched at once, defaults to all
+
+    Returns:
+        AlignedSeries
+    """
+    if not sources:
+        raise ValueError("At least one source should be provided")
+    if how not in ("inner", "left", "outer"):
+        raise ValueError(f"how should be one of inner, left, outer, got {how}")
+    start, end = _utc_range(start_date, end_date)
+    names = list(sources)
+    with ThreadPoolExecutor(max_threads or len(names)) as threads:
+        fetched = list(
+            threads.map(lambda name: _fetch_columns(sources[name], start, end), names)
+        )
+
+    all_keys = [keys for keys, _ in fetched]
+    if how == "inner":
+        keys = reduce(np.intersect1d, all_keys)
+    elif how == "left":
+        keys = all_keys[0]
+    else:
+        keys = reduce(np.union1d, all_keys)
+
+    values = {}
+    for name, (source_keys, columns) in zip(names, fetched):
+        positions = np.searchsorted(source_keys, keys)
+        found = positions < source_keys.size
+        found[found] = source_keys[positions[found]] == keys[found]
+        values[name] = {}
+        for col, column in columns.items():
+            aligned = np.full(keys.size, np.nan)
+            aligned[found] = column[positions[found]]
+            values[name][col] = aligned
+
+    start = (keys * period_seconds).astype("datetime64[s]")
+    settlement_date, settlement_period = to_settlement_periods(start)
+    return AlignedSeries(start, settlement_date, settlement_period, values)
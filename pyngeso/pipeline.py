@@ -0,0 +1,144 @@
+import csv
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+from typing import Callable, List, Optional, Tuple, Union
+
+from .backfill import Window, date_windows, window_name, window_query
+from .compression import open_compressed
+from .exceptions import IncompleteFetch
+from .pyngeso import NgEso
+from .records import response_result
+
+logger = logging.getLogger("PyNgEso")
+
+
+def records_to_csv(raw_path: str, out_path: str) -> int:
+    """
+    Decode the raw response of `NgEso.query` stored at `raw_path` and write its records
+    to `out_path` as csv, with the columns in the order reported by the API. The csv is
+    compressed according to the suffix of `out_path`, e.g. `.csv.gz`.
+
+    Returns:
+        int: number of records written
+    """
+    with open(raw_path, "rb") as f:
+        result = response_result(f.read())
+    records = result.get("records") or []
+    columns = [field["id"] for field in result.get("fields") or []]
+    if not columns and records:
+        columns = list(records[0])
+
+    with open_compressed(out_path, "wt", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows([record.get(col) for col in columns] for record in records)
+
+    return len(records)
+
+
+def fetch_and_convert(
+    client: NgEso,
+    date_col: str,
+    start_date: Union[date, datetime],
+    end_date: Union[date, datetime],
+    output_dir: str,
+    window_days: int = 30,
+    fields: Optional[List[str]] = None,
+    filters: Optional[List[str]] = None,
+    converter: Callable[[str, str], int] = records_to_csv,
+    suffix: str = ".csv",
+    max_threads: int = 4,
+    max_processes: Optional[int] = None,
+) -> List[Tuple[Window, str, int]]:
+    """
+    Fetch a date range window by window on a thread pool and convert each response on
+    a process pool, so that decoding large responses is not serialised by the GIL.
+    Windows are half-open, see `backfill.date_windows`.
+
+    Responses are handed over to the worker processes through files in `output_dir`
+    rather than pickled, and only the path of the converted file and its row count are
+    sent back. `converter` is called in the worker as converter(raw_path, out_path) and
+    should return the number of rows written; it must be picklable, i.e. defined at
+    module level.
+
+    The first failed fetch cancels the fetches not started yet, while the windows
+    already fetched are still converted. Raw response files are removed in any case.
+
+    Returns:
+        list: (window, path of the converted file, row count) for every window,
+            ordered by window, window ends being exclusive
+
+    Raises:
+        IncompleteFetch: if any window failed, holding the windows converted
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    windows = date_windows(start_date, end_date, window_days)
+    names = {window: window_name(client.resource, window) for window in windows}
+
+    def fetch(window: Window) -> str:
+        content = client.query(fields=fields, **window_query(date_col, window, filters))
+        raw_path = os.path.join(output_dir, names[window] + ".json")
+        with open(raw_path, "wb") as f:
+            f.write(content)
+        return raw_path
+
+    converted, failed = {}, {}
+    fetches, conversions = {}, {}
+    try:
+        with ThreadPoolExecutor(max_threads) as threads, ProcessPoolExecutor(
+            max_processes
+        ) as processes:
+            try:
+                fetches.update(
+                    {threads.submit(fetch, window): window for window in windows}
+                )
+                for future in as_completed(fetches):
+                    window = fetches[future]
+                    if future.cancelled():
+                        continue
+                    try:
+                        raw_path = future.result()
+                    except Exception as e:
+                        logger.error(f"Fetching {names[window]} failed: {e}")
+                        failed[window] = e
+                        for pending in fetches:
+                            pending.cancel()
+                        continue
+                    out_path = os.path.join(output_dir, names[window] + suffix)
+                    conversion = processes.submit(converter, raw_path, out_path)
+                    conversions[conversion] = (window, out_path)
+
+                for future in as_completed(conversions):
+                    window, out_path = conversions[future]
+                    try:
+                        n_rows = future.result()
+                    except Exception as e:
+                        logger.error(f"Converting {names[window]} failed: {e}")
+                        failed[window] = e
+                        continue
+                    logger.debug(
+                        f"Converted {n_rows} rows of {client.resource} to {out_path}"
+                    )
+                    converted[window] = (window, out_path, n_rows)
+            finally:
+                # stop before the pools wait for outstanding work on their way out
+                for future in list(fetches) + list(conversions):
+                    future.cancel()
+    finally:
+        # only reached once the pools have shut down, i.e. no fetch is writing
+        for window in windows:
+            raw_path = os.path.join(output_dir, names[window] + ".json")
+            if os.path.exists(raw_path):
+                os.remove(raw_path)
+
+    results = [converted[window] for window in windows if window in converted]
+    if failed:
+        raise IncompleteFetch(
+            f"{len(windows) - len(results)} of {len(windows)} windows of "
+            f"{client.resource} were not converted",
+            results,
+            failed,
+        ) from next(iter(failed.values()))
+    return results
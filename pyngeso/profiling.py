@@ -0,0 +1,184 @@
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, Iterator, List, Optional, Tuple
+
+Stack = Tuple[str, ...]
+
+_active: Optional["Profiler"] = None
+_null = nullcontext()
+
+
+class PhaseStats:
+    __slots__ = ("count", "wall", "max_wall", "cpu", "peak_memory")
+
+    def __init__(self):
+        self.count = 0
+        self.wall = 0.0
+        self.max_wall = 0.0
+        self.cpu = 0.0
+        self.peak_memory = 0
+
+    def add(self, wall: float, cpu: float, peak_memory: int) -> None:
+        self.count += 1
+        self.wall += wall
+        self.max_wall = max(self.max_wall, wall)
+        self.cpu += cpu
+        self.peak_memory = max(self.peak_memory, peak_memory)
+
+
+class Profiler:
+    """
+    Record the wall time, CPU time and (optionally) peak memory of each phase of the
+    requests made while the profiler is active, e.g.
+
+        with NgEso.profile() as profiler:
+            client.query(...)
+        print(profiler.report())
+
+    Phases are nested, `NgEso.query` records `query` with `construct_sql`, `http`,
+    `check_for_errors` and `missing_data` below it, and downstream code can add its
+    own with `profiler.phase(name)`. Requests made from any thread are recorded; CPU
+    time is the time of the thread running the phase. Peak memory, the most memory held
+    above the start of the phase at any point of any of its calls, is measured with
+    tracemalloc, which slows everything down and counts the allocations of all threads,
+    so it is only tracked with `track_allocations=True`. Python 3.8 cannot reset the
+    tracemalloc peak, so there only the memory still held at the end of a phase is
+    recorded.
+    """
+
+    def __init__(self, track_allocations: bool = False):
+        self.track_allocations = track_allocations
+        self.stats: Dict[Stack, PhaseStats] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started_tracemalloc = False
+
+    def __enter__(self) -> "Profiler":
+        global _active
+        if _active is not None:
+            raise RuntimeError("A profiler is already active")
+        if self.track_allocations:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+        _active = self
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        global _active
+        _active = None
+        if self._started_tracemalloc:
+            import tracemalloc
+
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _stack(self) -> List[str]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+            # [memory at the start, highest memory seen so far] of every open phase
+            self._local.memory = []
+        return stack
+
+    def _start_memory(self) -> None:
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory()
+        memory = self._local.memory
+        if memory:
+            memory[-1][1] = max(memory[-1][1], peak)
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        memory.append([current, current])
+
+    def _stop_memory(self) -> int:
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory()
+        memory = self._local.memory
+        start, highest = memory.pop()
+        if not hasattr(tracemalloc, "reset_peak"):  # pragma: no cover - python 3.8
+            return max(current - start, 0)
+        highest = max(highest, peak)
+        if memory:
+            memory[-1][1] = max(memory[-1][1], highest)
+        tracemalloc.reset_peak()
+        return highest - start
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        stack = self._stack()
+        stack.append(name)
+        path = tuple(stack)
+        if self.track_allocations:
+            self._start_memory()
+        cpu_start = time.thread_time()
+        wall_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            peak_memory = 0
+            if self.track_allocations:
+                peak_memory = self._stop_memory()
+            stack.pop()
+            with self._lock:
+                stats = self.stats.get(path)
+                if stats is None:
+                    stats = self.stats[path] = PhaseStats()
+                stats.add(wall, cpu, peak_memory)
+
+    def self_times(self, metric: str = "wall") -> Dict[Stack, float]:
+        """Time spent in each phase excluding its nested phases"""
+        totals = {path: getattr(stats, metric) for path, stats in self.stats.items()}
+        self_times = dict(totals)
+        for path, total in totals.items():
+            if len(path) > 1 and path[:-1] in self_times:
+                self_times[path[:-1]] -= total
+        return self_times
+
+    def report(self) -> str:
+        """Table of the aggregated stats of every phase, nested phases indented"""
+        header = (
+            f"{'phase':<40} {'count':>8} {'wall_s':>10} {'mean_ms':>10} "
+            f"{'max_ms':>10} {'cpu_s':>10} {'peak_kb':>10}"
+        )
+        lines = [header]
+        for path in sorted(self.stats):
+            stats = self.stats[path]
+            name = "  " * (len(path) - 1) + path[-1]
+            lines.append(
+                f"{name:<40} {stats.count:>8} {stats.wall:>10.3f} "
+                f"{1000 * stats.wall / stats.count:>10.2f} "
+                f"{1000 * stats.max_wall:>10.2f} {stats.cpu:>10.3f} "
+                f"{stats.peak_memory / 1024:>10.1f}"
+            )
+        return "\n".join(lines)
+
+    def collapsed(self, metric: str = "wall") -> str:
+        """
+        Self time of every phase in microseconds, in the collapsed stack format read
+        by flamegraph.pl, speedscope and similar tools. `metric` is wall or cpu.
+        """
+        self_times = self.self_times(metric)
+        return "\n".join(
+            f"{';'.join(path)} {max(round(1e6 * self_times[path]), 0)}"
+            for path in sorted(self_times)
+        )
+
+    def dump(self, path: str, metric: str = "wall") -> None:
+        with open(path, "w") as f:
+            f.write(self.collapsed(metric) + "\n")
+
+
+def phase(name: str) -> ContextManager[None]:
+    """Record `name` with the active profiler, if any; a no-op otherwise"""
+    profiler = _active
+    if profiler is None:
+        return _null
+    return profiler.phase(name)
@@ -1,20 +1,43 @@
 import json
 import logging
+import os
 from datetime import date, datetime
-from typing import List, Literal, Optional, Union
-
-import requests
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Literal, Optional, Union
 
 from .configure_logging import setup_logger
 from .exceptions import UnsuccessfulRequest
-from .resources import api_resource_ids, file_resource_ids
+from .profiling import Profiler, phase
+
+# the HTTP stack, the resource catalog and the optional modules are imported on first
+# use to keep `import pyngeso` cheap for short-lived processes
+if TYPE_CHECKING:
+    import requests
+
+    from .records import RecordView
 
-logger = setup_logger(logging.getLogger("PyNgEso"))
+logger = logging.getLogger("PyNgEso")
 
 date_fmt = "%Y-%m-%d"
 datetime_fmt = "%Y-%m-%dT%H:%M:%S"
 
 
+@lru_cache(maxsize=None)
+def configure_logger() -> logging.Logger:
+    return setup_logger(logger)
+
+
+@lru_cache(maxsize=None)
+def request_headers() -> Dict[str, str]:
+    """
+    Advertise every content-encoding urllib3 can decode (gzip/deflate, plus br/zstd
+    when brotli/zstandard are installed)
+    """
+    from urllib3.util.request import ACCEPT_ENCODING
+
+    return {"Accept-Encoding": ACCEPT_ENCODING}
+
+
 class NgEso:
     """
     A class for fetching data from the National Grid ESO data portal.
@@ -29,10 +52,21 @@ class NgEso:
     def __init__(self, resource: str, backend: Literal["api", "file"] = "api"):
         self.resource = resource
         self.backend = backend
+        configure_logger()
 
         self.resource_id, self.dataset_id, self.filename = self.set_resource_info()
 
+    @staticmethod
+    def profile(track_allocations: bool = False) -> Profiler:
+        """
+        Profiling context recording the time spent in each phase of the requests made
+        within it, see `profiling.Profiler`
+        """
+        return Profiler(track_allocations)
+
     def set_resource_info(self) -> (str, str, str):
+        from .resources import api_resource_ids, file_resource_ids
+
         dataset_id = None
         filename = None
         if self.backend == "api":
@@ -51,19 +85,67 @@ class NgEso:
         end_date: Optional[Union[date, datetime]] = None,
         filters: Optional[List[str]] = None,
         limit: Optional[int] = None,
+        period_col: Optional[str] = None,
+        start_period: Optional[int] = None,
+        end_period: Optional[int] = None,
     ) -> bytes:
+        import requests
 
         url = "https://api.neso.energy/api/3/action/datastore_search_sql"
-        sql = self.construct_sql(fields, date_col, start_date, end_date, filters, limit)
-        params = {"sql": sql}
-
-        logger.debug(f"Querying {self.resource}: {sql}")
-        r = requests.get(url, params=params)
-        self._check_for_errors(r)
-        self._missing_data(r)
+        with phase("query"):
+            with phase("construct_sql"):
+                sql = self.construct_sql(
+                    fields,
+                    date_col,
+                    start_date,
+                    end_date,
+                    filters,
+                    limit,
+                    period_col,
+                    start_period,
+                    end_period,
+                )
+            params = {"sql": sql}
+
+            logger.debug(f"Querying {self.resource}: {sql}")
+            with phase("http"):
+                r = requests.get(url, params=params, headers=request_headers())
+            with phase("check_for_errors"):
+                self._check_for_errors(r)
+            with phase("missing_data"):
+                self._missing_data(r)
 
         return r.content
 
+    def query_records(
+        self,
+        fields: Optional[List[str]] = None,
+        date_col: Optional[str] = None,
+        start_date: Optional[Union[date, datetime]] = None,
+        end_date: Optional[Union[date, datetime]] = None,
+        filters: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        period_col: Optional[str] = None,
+        start_period: Optional[int] = None,
+        end_period: Optional[int] = None,
+    ) -> "RecordView":
+        """Same as `query`, returning the records as typed rows"""
+        from .records import RecordView
+
+        content = self.query(
+            fields,
+            date_col,
+            start_date,
+            end_date,
+            filters,
+            limit,
+            period_col,
+            start_period,
+            end_period,
+        )
+        with phase("parse_records"):
+            return RecordView(content, self.resource)
+
     def construct_sql(
         self,
         fields: Optional[List[str]] = None,
@@ -72,6 +154,9 @@ class NgEso:
         end_date: Optional[Union[date, datetime]] = None,
         filters: Optional[List[str]] = None,
         limit: Optional[int] = None,
+        period_col: Optional[str] = None,
+        start_period: Optional[int] = None,
+        end_period: Optional[int] = None,
     ) -> str:
         fields_sql = "*"
         date_filter_sql = ""
@@ -82,8 +167,22 @@ class NgEso:
             # double quote all fields
             fields_sql = ", ".join([f'"{i}"' for i in fields])
 
+        if period_col is None and (start_period, end_period) != (None, None):
+            raise ValueError("period_col should be provided to filter by period")
+        if date_col is None and period_col is not None:
+            raise ValueError("date_col should be provided to filter by period")
+
         date_filtering = date_col is not None
-        if date_filtering:
+        if date_filtering and period_col is not None:
+            date_filter_sql = self.construct_settlement_range(
+                date_col,
+                period_col,
+                start_date,
+                end_date,
+                start_period,
+                end_period,
+            )
+        elif date_filtering:
             date_filter_sql = self.construct_date_range(date_col, start_date, end_date)
 
         if filters:
@@ -135,6 +234,58 @@ class NgEso:
 
         return date_filter_sql
 
+    def construct_settlement_range(
+        self,
+        date_col: str,
+        period_col: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        start_period: Optional[int] = None,
+        end_period: Optional[int] = None,
+    ) -> str:
+        """
+        Filter on a range of (settlement date, settlement period), e.g. from period 17
+        of start_date to period 20 of end_date. Rows are first restricted to the range
+        of dates, so the date column can still be used for the lookup, and the periods
+        only trim the first and last day.
+        """
+        self.validate_settlement_period(start_period)
+        self.validate_settlement_period(end_period)
+        if start_period is not None and start_date is None:
+            raise ValueError("start_period should be provided with a start_date")
+        if end_period is not None and end_date is None:
+            raise ValueError("end_period should be provided with an end_date")
+
+        if start_date is None and end_period is not None:
+            # the last day is trimmed by period, so it is included in the date range
+            end = self.datetime_to_str(end_date)
+            date_filter_sql = f"where \"{date_col}\" <= '{end}'::timestamp"
+        else:
+            date_filter_sql = self.construct_date_range(date_col, start_date, end_date)
+        conditions = [date_filter_sql]
+        if start_period is not None:
+            start_date = self.datetime_to_str(start_date)
+            conditions.append(
+                f"(\"{date_col}\" > '{start_date}'::timestamp "
+                f'or "{period_col}" >= {start_period})'
+            )
+        if end_period is not None:
+            end_date = self.datetime_to_str(end_date)
+            conditions.append(
+                f"(\"{date_col}\" < '{end_date}'::timestamp "
+                f'or "{period_col}" <= {end_period})'
+            )
+
+        return " and ".join(conditions)
+
+    @staticmethod
+    def validate_settlement_period(settlement_period: Optional[int]) -> None:
+        if settlement_period is None:
+            return
+        assert (
+            isinstance(settlement_period, int) and 1 <= settlement_period <= 50
+        ), "settlement periods should be integers between 1 and 50"
+
     @staticmethod
     def construct_filter_sql(filters: List[str], date_filtering: bool) -> str:
         cond_join = " and "
@@ -165,7 +316,7 @@ class NgEso:
                 return datetime_obj.strftime(date_fmt)
         return datetime_obj
 
-    def _check_for_errors(self, r: requests.Response) -> None:
+    def _check_for_errors(self, r: "requests.Response") -> None:
         """Inspect the request response and the metadata in xml"""
         # http response errors
         self._check_request_errors(r)
@@ -176,13 +327,13 @@ class NgEso:
             logger.error(f"Request failed: {rb.get('error')}")
 
     @staticmethod
-    def _check_request_errors(r: requests.Response) -> None:
+    def _check_request_errors(r: "requests.Response") -> None:
         status_code = r.status_code
         if status_code != 200 or r.content is None:
             raise UnsuccessfulRequest(f"status_code={status_code}:{r.content}")
 
     @staticmethod
-    def _missing_data(r: requests.Response) -> None:
+    def _missing_data(r: "requests.Response") -> None:
         """
         The ESO API does not report for no data found. The result section of the
         response cam be inspected and log if none were found
@@ -193,12 +344,45 @@ class NgEso:
         if not records:
             logger.warning(f"{query}: No data found")
 
-    def download_file(self) -> bytes:
-        url = (
+    def file_url(self) -> str:
+        return (
             f"https://data.nationalgrideso.com/backend/dataset/{self.dataset_id}/"
             f"resource/{self.resource_id}/download/{self.filename}"
         )
-        r = requests.get(url)
-        self._check_request_errors(r)
+
+    def download_file(self) -> bytes:
+        import requests
+
+        with phase("download_file"):
+            r = requests.get(self.file_url(), headers=request_headers())
+            self._check_request_errors(r)
 
         return r.content
+
+    def save_file(self, path: str, chunk_size: int = 1024 * 1024) -> str:
+        """
+        Stream the file of the resource to `path`, decoding the transfer encoding chunk
+        by chunk. The file is compressed according to its suffix (see
+        `compression.open_compressed`), e.g. `df_fuel_ckan.csv.gz`. It is written to a
+        temporary path first and only moved into place once complete.
+        """
+        import requests
+
+        from .compression import open_compressed
+
+        with phase("save_file"), requests.get(
+            self.file_url(), headers=request_headers(), stream=True
+        ) as r:
+            if r.status_code != 200:
+                self._check_request_errors(r)
+            tmp_path = path + ".tmp" + os.path.splitext(path)[1]
+            try:
+                with open_compressed(tmp_path, "wb") as f:
+                    for chunk in r.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        return path
@@ -0,0 +1,135 @@
+import json
+import keyword
+import re
+from collections import namedtuple
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+Converter = Callable[[Any], Any]
+
+# datastore (postgres) column types and how their values are converted
+converters: Dict[str, Converter] = {
+    "timestamp": datetime.fromisoformat,
+    "date": date.fromisoformat,
+    "int": int,
+    "int2": int,
+    "int4": int,
+    "int8": int,
+    "numeric": float,
+    "float4": float,
+    "float8": float,
+    "bool": bool,
+}
+
+_record_types: Dict[Tuple, type] = {}
+
+
+def response_result(response: Union[bytes, Dict]) -> Dict:
+    """
+    The `result` of a `NgEso.query` response, given as its content or its parsed body;
+    empty when the request failed
+    """
+    if isinstance(response, (bytes, str)):
+        response = json.loads(response)
+    return response.get("result") or {}
+
+
+def response_records(response: Union[bytes, Dict]) -> List[Dict]:
+    """The records of a `NgEso.query` response, see `response_result`"""
+    return response_result(response).get("records") or []
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _field_name(column: str) -> str:
+    name = re.sub(r"\W+", "_", column).strip("_")
+    if keyword.iskeyword(name):
+        name += "_"
+    return name
+
+
+def record_type(resource: Optional[str], fields: Sequence[Dict[str, str]]) -> type:
+    """
+    Return the row type for the fields reported by the datastore, generating it on
+    first use. Row types are namedtuples, so rows carry no per-instance __dict__.
+    Column names which are not valid identifiers are sanitised (e.g. `EFA Date` to
+    `EFA_Date`); the original names are kept in the type's `_columns`.
+    """
+    key = (resource, tuple((field["id"], field.get("type")) for field in fields))
+    row_type = _record_types.get(key)
+    if row_type is None:
+        columns = [field["id"] for field in fields]
+        type_name = "".join(
+            part.capitalize() for part in re.split(r"\W+", resource or "") if part
+        )
+        row_type = namedtuple(
+            f"{type_name}Record", [_field_name(col) for col in columns], rename=True
+        )
+        row_type._columns = tuple(columns)
+        row_type._types = tuple(field.get("type") for field in fields)
+        _record_types[key] = row_type
+    return row_type
+
+
+def _convert_column(convert: Converter, values: Sequence) -> List:
+    if convert is _identity:
+        return list(values)
+    return [value if value is None else convert(value) for value in values]
+
+
+class RecordView(Sequence):
+    """
+    A read-only view of the records of a `NgEso.query` response as typed rows.
+
+    The response is parsed once and its values converted column by column, timestamps
+    and numbers according to the field types reported by the datastore, into one list
+    per column. Typed rows (see `record_type`) are only built from those lists when
+    accessed, so iterating a view holds one row at a time and no value is converted
+    twice; use `to_list` to build every row once and keep them.
+
+    Args:
+        content (bytes): content of the response returned by `NgEso.query`
+        resource (str): name of the resource, used to name the row type
+    """
+
+    def __init__(self, content: bytes, resource: Optional[str] = None):
+        result = response_result(content)
+        records = result.get("records") or []
+        fields = result.get("fields")
+        if not fields:
+            fields = [{"id": col} for col in (records[0] if records else [])]
+
+        self.row_type = record_type(resource, fields)
+        self.columns: Tuple[str, ...] = self.row_type._columns
+        self._length = len(records)
+        self._values = [
+            _convert_column(
+                converters.get(field.get("type"), _identity),
+                [record.get(col) for record in records],
+            )
+            for col, field in zip(self.columns, fields)
+        ]
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(
+                map(self.row_type._make, zip(*(col[index] for col in self._values)))
+            )
+        if not -self._length <= index < self._length:
+            raise IndexError("record index out of range")
+        return self.row_type._make(col[index] for col in self._values)
+
+    def __iter__(self) -> Iterator[Tuple]:
+        return map(self.row_type._make, zip(*self._values))
+
+    def column(self, name: str) -> List:
+        """Converted values of one column, by its original name"""
+        return list(self._values[self.columns.index(name)])
+
+    def to_list(self) -> List[Tuple]:
+        return list(self)
@@ -0,0 +1,186 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from .records import response_records
+from .settlement import np, period_length, period_seconds, to_settlement_periods
+
+aggregations = ("mean", "min", "max", "first", "last")
+fill_methods = ("ffill", "interpolate")
+
+
+class SettlementSeries(NamedTuple):
+    """
+    Values aggregated to settlement periods, one entry per period of the resampled
+    range, including periods without any samples.
+    """
+
+    start: np.ndarray  # datetime64[s], UTC start of each period
+    settlement_date: np.ndarray  # datetime64[D]
+    settlement_period: np.ndarray  # int64
+    count: Dict[str, np.ndarray]  # column -> number of non-NaN samples in each period
+    values: Dict[str, np.ndarray]
+
+    @property
+    def missing(self) -> Dict[str, np.ndarray]:
+        return {col: count == 0 for col, count in self.count.items()}
+
+
+def columns_from_response(
+    content: bytes, time_col: str, value_cols: Sequence[str]
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Extract the timestamps and value columns of a `NgEso.query` response as arrays,
+    ready to be passed to `resample`. Missing values become NaN.
+    """
+    records = response_records(content)
+    timestamps = np.array(
+        [record[time_col] for record in records], dtype="datetime64[s]"
+    )
+    columns = {
+        col: np.array([record.get(col) for record in records], dtype="float64")
+        for col in value_cols
+    }
+    return timestamps, columns
+
+
+def _seconds(timestamp) -> int:
+    return int(np.datetime64(timestamp, "s").astype("int64"))
+
+
+def _aggregate(
+    values: np.ndarray, starts: np.ndarray, counts: np.ndarray, how: str
+) -> np.ndarray:
+    if how == "mean":
+        return np.add.reduceat(values, starts) / counts
+    if how == "min":
+        return np.minimum.reduceat(values, starts)
+    if how == "max":
+        return np.maximum.reduceat(values, starts)
+    if how == "first":
+        return values[starts]
+    return values[starts + counts - 1]
+
+
+def _fill(values: np.ndarray, missing: np.ndarray, method: str) -> np.ndarray:
+    present = np.flatnonzero(~missing)
+    if not present.size or not missing.any():
+        return values
+    if method == "ffill":
+        last_present = np.where(missing, 0, np.arange(values.size))
+        np.maximum.accumulate(last_present, out=last_present)
+        filled = values[last_present]
+        # periods before the first sample have nothing to carry forward
+        filled[: present[0]] = np.nan
+        return filled
+    filled = values.copy()
+    gaps = np.flatnonzero(missing)
+    filled[gaps] = np.interp(gaps, present, values[present], left=np.nan, right=np.nan)
+    return filled
+
+
+def resample(
+    timestamps,
+    columns: Dict[str, Sequence[float]],
+    how: Union[str, Dict[str, str]] = "mean",
+    start=None,
+    end=None,
+    fill: Optional[str] = None,
+) -> SettlementSeries:
+    """
+    Aggregate samples to settlement periods.
+
+    Samples are binned into the UTC half-hours settlement periods are made of, so clock
+    change days naturally have 46 or 50 periods. Samples are sorted once for all
+    columns; NaN samples (e.g. nulls in the response) are left out of the aggregation
+    and counts of their column, so periods with only NaN samples are missing.
+
+    Args:
+        timestamps: UTC sample times, as datetime64 values or ISO 8601 strings
+        columns (dict): column name to sample values, aligned with `timestamps`
+        how (str or dict): aggregation, one of mean, min, max, first, last, or a dict
+            of aggregation per column
+        start: start of the resampled range (inclusive), defaults to the period of the
+            first sample; set it to detect periods missing at the start of the range
+        end: end of the resampled range (exclusive), defaults to the end of the period
+            of the last sample
+        fill (str): optional, fill periods without samples with "ffill" (last known
+            value) or "interpolate" (linear interpolation); left as NaN otherwise
+
+    Returns:
+        SettlementSeries
+    """
+    hows = {
+        col: how.get(col, "mean") if isinstance(how, dict) else how for col in columns
+    }
+    for col_how in hows.values():
+        if col_how not in aggregations:
+            raise ValueError(f"how should be one of {aggregations}, got {col_how}")
+    if fill is not None and fill not in fill_methods:
+        raise ValueError(f"fill should be one of {fill_methods}, got {fill}")
+    if start is not None and end is not None and _seconds(end) <= _seconds(start):
+        raise ValueError("end should be after start")
+
+    timestamps = np.asarray(timestamps, dtype="datetime64[s]")
+    bins = timestamps.astype("int64") // period_seconds
+
+    if bins.size == 0 and (start is None or end is None):
+        raise ValueError("start and end should be provided when there are no samples")
+    first_bin = bins.min() if start is None else _seconds(start) // period_seconds
+    last_bin = bins.max() if end is None else (_seconds(end) - 1) // period_seconds
+    if last_bin < first_bin:
+        raise ValueError(
+            "start should be before the last sample and end after the first"
+        )
+
+    in_range = (bins >= first_bin) & (bins <= last_bin)
+    order = np.argsort(bins[in_range], kind="stable")
+    bins = bins[in_range][order]
+    n_periods = int(last_bin - first_bin + 1)
+
+    count, values = {}, {}
+    for col, samples in columns.items():
+        samples = np.asarray(samples, dtype="float64")[in_range][order]
+        present = ~np.isnan(samples)
+        samples = samples[present]
+        occupied, starts, counts = np.unique(
+            bins[present], return_index=True, return_counts=True
+        )
+        slots = occupied - first_bin
+
+        count[col] = np.zeros(n_periods, dtype="int64")
+        count[col][slots] = counts
+        aggregated = np.full(n_periods, np.nan)
+        if starts.size:
+            aggregated[slots] = _aggregate(samples, starts, counts, hows[col])
+        if fill is not None:
+            aggregated = _fill(aggregated, count[col] == 0, fill)
+        values[col] = aggregated
+
+    period_start = (np.arange(first_bin, last_bin + 1) * period_seconds).astype(
+        "datetime64[s]"
+    )
+    settlement_date, settlement_period = to_settlement_periods(period_start)
+    return SettlementSeries(
+        period_start, settlement_date, settlement_period, count, values
+    )
+
+
+def find_gaps(
+    series: SettlementSeries, column: Optional[str] = None
+) -> List[Tuple[np.datetime64, np.datetime64]]:
+    """
+    UTC (start, end) of every run of consecutive periods without samples of `column`,
+    or without samples of any column when `column` is not given
+    """
+    if column is not None:
+        missing = series.missing[column]
+    else:
+        missing = np.ones(series.start.size, dtype=bool)
+        for column_missing in series.missing.values():
+            missing &= column_missing
+    edges = np.diff(np.concatenate(([0], missing.astype("int8"), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+    return [
+        (series.start[i], series.start[j - 1] + period_length)
+        for i, j in zip(run_starts, run_ends)
+    ]
@@ -0,0 +1,203 @@
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Union
+
+from .changes import records_digest
+from .pyngeso import NgEso
+
+logger = logging.getLogger("PyNgEso")
+
+Callback = Callable[[str, bytes], None]
+
+
+class _Poll:
+    def __init__(
+        self,
+        client: NgEso,
+        query_kwargs: Union[Dict, Callable[[], Dict]],
+        interval: float,
+        min_interval: float,
+        max_interval: float,
+        backoff: float,
+        history: int,
+    ):
+        self.client = client
+        self.query_kwargs = query_kwargs
+        self.base_interval = interval
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.publications: Deque[float] = deque(maxlen=history)
+        self.callbacks: List[Callback] = []
+        self.digest: Optional[str] = None
+        self.next_due = 0.0
+
+    @property
+    def period(self) -> Optional[float]:
+        """Median time between observed publications, once two gaps are known"""
+        if len(self.publications) < 3:
+            return None
+        times = list(self.publications)
+        return statistics.median(b - a for a, b in zip(times, times[1:]))
+
+    def schedule(self, now: float, changed: bool, published: bool = False) -> None:
+        """
+        Set the next poll. `published` is only true for changes following a previous
+        successful poll, the first fetch of a resource is not a publication
+        """
+        period = self.period
+        if changed:
+            if published:
+                self.publications.append(now)
+            period = self.period
+            if period is None:
+                self.interval = self.base_interval
+                self.next_due = now + self.interval
+            else:
+                # sleep through the expected quiet spell, then poll closely around the
+                # next expected publication
+                self.interval = self.min_interval
+                self.next_due = now + max(self.min_interval, period - self.min_interval)
+            return
+
+        expected = self.publications[-1] + period if period is not None else None
+        if expected is not None and now < expected + period / 4:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        self.next_due = now + max(self.interval, self.min_interval)
+
+
+class PollingScheduler:
+    """
+    Poll a set of resources and notify subscribers only when new data is published.
+
+    Each resource starts polling every `interval` seconds. Polls returning the same
+    records back off exponentially up to `max_interval`. Once a few publications have
+    been observed, the median time between them is used to skip polling until shortly
+    before the next expected publication, after which the resource is polled every
+    `min_interval` seconds until new data appears.
+
+    Args:
+        clock (callable): returns the current time in seconds
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._polls: Dict[str, _Poll] = {}
+        self._stop = threading.Event()
+
+    def add(
+        self,
+        name: str,
+        client: NgEso,
+        query_kwargs: Union[Dict, Callable[[], Dict]],
+        callback: Optional[Callback] = None,
+        interval: float = 300,
+        min_interval: float = 60,
+        max_interval: float = 3600,
+        backoff: float = 2.0,
+        history: int = 10,
+    ) -> None:
+        """
+        Register a resource to poll.
+
+        Args:
+            name (str): key the resource is registered and reported under
+            client (NgEso): client for the resource
+            query_kwargs (dict or callable): keyword arguments for `NgEso.query`, or a
+                callable returning them on every poll (e.g. a window relative to today)
+            callback (callable): optional subscriber, see `subscribe`
+            interval (float): initial polling interval in seconds
+            min_interval (float): shortest polling interval in seconds
+            max_interval (float): longest polling interval in seconds
+            backoff (float): factor the interval grows by after an unchanged poll
+            history (int): number of publication times the cadence is learned from
+        """
+        if name in self._polls:
+            raise ValueError(f"{name} is already scheduled")
+        poll = _Poll(
+            client, query_kwargs, interval, min_interval, max_interval, backoff, history
+        )
+        poll.next_due = self.clock()
+        self._polls[name] = poll
+        if callback is not None:
+            self.subscribe(name, callback)
+
+    def subscribe(self, name: str, callback: Callback) -> None:
+        """Call callback(name, content) every time new data is fetched for `name`"""
+        self._polls[name].callbacks.append(callback)
+
+    def remove(self, name: str) -> None:
+        del self._polls[name]
+
+    def poll(self, name: str) -> bool:
+        """
+        Query a resource once, notifying its subscribers if its records changed since
+        the last poll.
+
+        Returns:
+            bool: whether new data was found
+        """
+        poll = self._polls[name]
+        try:
+            query_kwargs = poll.query_kwargs
+            if callable(query_kwargs):
+                query_kwargs = query_kwargs()
+            content = poll.client.query(**query_kwargs)
+            digest = records_digest(content)
+        except Exception as e:
+            # any failure is treated as a failed poll so that the other resources keep
+            # being polled
+            logger.warning(f"Polling {name} failed: {e!r}")
+            poll.schedule(self.clock(), changed=False)
+            return False
+
+        changed = digest != poll.digest
+        published = changed and poll.digest is not None
+        poll.digest = digest
+        poll.schedule(self.clock(), changed=changed, published=published)
+        logger.debug(
+            f"Polled {name}: changed={changed}, next poll in {poll.interval:.0f}s"
+        )
+
+        if changed:
+            for callback in poll.callbacks:
+                try:
+                    callback(name, content)
+                except Exception:
+                    logger.exception(f"Subscriber {callback!r} of {name} failed")
+        return changed
+
+    def next_due(self) -> Optional[float]:
+        """Time at which the next resource is due to be polled"""
+        if not self._polls:
+            return None
+        return min(poll.next_due for poll in self._polls.values())
+
+    def run_pending(self) -> List[str]:
+        """
+        Poll every resource that is due.
+
+        Returns:
+            list: names of the resources which had new data
+        """
+        now = self.clock()
+        due = [name for name, poll in self._polls.items() if poll.next_due <= now]
+        return [name for name in due if self.poll(name)]
+
+    def run(self) -> None:
+        """Poll resources as they fall due until `stop` is called"""
+        self._stop.clear()
+        while not self._stop.is_set():
+            self.run_pending()
+            next_due = self.next_due()
+            timeout = None if next_due is None else max(next_due - self.clock(), 0)
+            self._stop.wait(timeout)
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,112 @@
+"""
+GB settlement periods.
+
+A settlement day runs from local (Europe/London) midnight to local midnight and is split
+into half-hour settlement periods numbered from 1. Clock changes happen at 01:00 UTC on
+the last Sunday of March and October, so settlement days have 48 periods, 46 on the day
+clocks go forward and 50 on the day they go back. Settlement periods are whole UTC
+half-hours, which is what the functions below work with.
+"""
+
+from datetime import date
+from typing import Dict, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    raise ImportError(
+        "numpy is required for settlement period support: pip install pyngeso[numpy]"
+    ) from None
+
+period_length = np.timedelta64(30, "m")
+period_seconds = int(period_length / np.timedelta64(1, "s"))
+hour = np.timedelta64(1, "h")
+no_offset = np.timedelta64(0, "h")
+
+
+def _last_sunday(years: np.ndarray, month: int) -> np.ndarray:
+    month_end = (years + np.timedelta64(month, "M")).astype("datetime64[D]") - 1
+    # 1970-01-01 was a Thursday, so (days + 3) % 7 is the weekday with Monday == 0
+    weekday = (month_end.astype("int64") + 3) % 7
+    return month_end - ((weekday + 1) % 7).astype("timedelta64[D]")
+
+
+def clock_change_days(years) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Days on which clocks go forward and back in each of `years`, given either as
+    integers or as datetime64 values falling in the years
+    """
+    years = np.asarray(years)
+    if np.issubdtype(years.dtype, np.datetime64):
+        years = years.astype("datetime64[Y]")
+    else:
+        years = (years.astype("int64") - 1970).astype("datetime64[Y]")
+    return _last_sunday(years, 3), _last_sunday(years, 10)
+
+
+def utc_offset(timestamps) -> np.ndarray:
+    """Offset of local time from UTC (0 or 1 hour) at each of the UTC `timestamps`"""
+    timestamps = np.asarray(timestamps, dtype="datetime64[s]")
+    forward, back = clock_change_days(timestamps)
+    bst = (timestamps >= forward + hour) & (timestamps < back + hour)
+    return np.where(bst, hour, no_offset).astype("timedelta64[s]")
+
+
+def local_midnight(dates) -> np.ndarray:
+    """UTC time at which each settlement day of `dates` starts"""
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    forward, back = clock_change_days(dates)
+    bst = (dates > forward) & (dates <= back)
+    return dates.astype("datetime64[s]") - np.where(bst, hour, no_offset)
+
+
+def periods_in_day(dates) -> np.ndarray:
+    """Number of settlement periods (46, 48 or 50) of each settlement day of `dates`"""
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    forward, back = clock_change_days(dates)
+    return 48 - 2 * (dates == forward) + 2 * (dates == back)
+
+
+def to_settlement_periods(timestamps) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Settlement date and settlement period containing each of the UTC `timestamps`.
+
+    Returns:
+        tuple: settlement dates (datetime64[D]) and settlement periods (int64)
+    """
+    timestamps = np.asarray(timestamps, dtype="datetime64[s]")
+    dates = (timestamps + utc_offset(timestamps)).astype("datetime64[D]")
+    periods = (timestamps - local_midnight(dates)) // period_length + 1
+    return dates, periods.astype("int64")
+
+
+def settlement_period_start(dates, periods) -> np.ndarray:
+    """
+    UTC start (datetime64[s]) of each settlement period given by `dates` and
+    `periods`, e.g. the SETTLEMENT_DATE and SETTLEMENT_PERIOD columns of a resource
+    """
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    periods = np.asarray(periods, dtype="int64")
+    if ((periods < 1) | (periods > periods_in_day(dates))).any():
+        raise ValueError("settlement periods should be between 1 and periods_in_day")
+    return local_midnight(dates) + (periods - 1) * period_length
+
+
+def settlement_window(start, end) -> Dict[str, object]:
+    """
+    Settlement dates and periods covering the UTC range [start, end), as keyword
+    arguments for `NgEso.query` together with `date_col` and `period_col`, so that only
+    the periods overlapping the range are fetched rather than whole days.
+    """
+    start = np.datetime64(start, "s")
+    end = np.datetime64(end, "s")
+    if end <= start:
+        raise ValueError("end should be after start")
+    dates, periods = to_settlement_periods(np.array([start, end - 1], "datetime64[s]"))
+    start_date, end_date = (date.fromisoformat(str(d)) for d in dates)
+    return {
+        "start_date": start_date,
+        "start_period": int(periods[0]),
+        "end_date": end_date,
+        "end_period": int(periods[1]),
+    }
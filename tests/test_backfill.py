@@ -0,0 +1,175 @@
+import json
+from datetime import date, datetime
+
+import pytest
+
+from pyngeso import NgEso
+from pyngeso.backfill import BackfillJob, date_windows, window_query
+from pyngeso.exceptions import UnsuccessfulRequest
+
+
+def _response(n_rows: int, truncated: bool = False) -> bytes:
+    result = {"records": [{"id": i} for i in range(n_rows)]}
+    if truncated:
+        result["records_truncated"] = True
+    return json.dumps({"success": True, "result": result}).encode()
+
+
+def test_date_windows():
+    windows = date_windows(date(2021, 1, 1), date(2021, 1, 10), 4)
+
+    assert windows == [
+        (date(2021, 1, 1), date(2021, 1, 5)),
+        (date(2021, 1, 5), date(2021, 1, 9)),
+        (date(2021, 1, 9), date(2021, 1, 11)),
+    ]
+
+
+def test_date_windows_datetimes():
+    windows = date_windows(datetime(2023, 11, 2, 23), datetime(2023, 11, 4, 12), 1)
+
+    assert windows == [
+        (datetime(2023, 11, 2, 23), datetime(2023, 11, 3, 23)),
+        (datetime(2023, 11, 3, 23), datetime(2023, 11, 4, 12)),
+    ]
+    with pytest.raises(ValueError):
+        date_windows(date(2021, 1, 1), date(2021, 1, 2), 0)
+
+
+def test_window_query_is_half_open():
+    client = NgEso("dx-eac-eso-sell-orders")
+    window = (datetime(2023, 11, 2, 23), datetime(2023, 11, 3, 23))
+    sql = client.construct_sql(**window_query("deliveryStart", window))
+
+    assert sql.endswith(
+        "where \"deliveryStart\" >= '2023-11-02T23:00:00'::timestamp "
+        "and \"deliveryStart\" < '2023-11-03T23:00:00'::timestamp "
+    )
+
+
+def test_backfill_resumes_missing_windows(monkeypatch, tmp_path):
+    calls = []
+    fail_on = {date(2021, 1, 3)}
+
+    def query(self, **kwargs):
+        calls.append(kwargs["start_date"])
+        if kwargs["start_date"] in fail_on:
+            raise UnsuccessfulRequest("status_code=500:b''")
+        return _response(2)
+
+    monkeypatch.setattr(NgEso, "query", query)
+    sunk = {}
+
+    def make_job():
+        return BackfillJob(
+            NgEso("historic-demand-data-2021"),
+            date_col="SETTLEMENT_DATE",
+            start_date=date(2021, 1, 1),
+            end_date=date(2021, 1, 4),
+            state_path=str(tmp_path / "state.db"),
+            window_days=1,
+            sink=lambda start, end, content: sunk.__setitem__(start, content),
+        )
+
+    job = make_job()
+    job.run()
+    assert job.pending_windows() == [(date(2021, 1, 3), date(2021, 1, 4))]
+    assert len(sunk) == 3
+
+    # a new job over the same state file only fetches the failed window
+    fail_on.clear()
+    calls.clear()
+    job = make_job()
+    job.run()
+    assert calls == [date(2021, 1, 3)]
+    assert job.pending_windows() == []
+    state = job.state()
+    assert state[(date(2021, 1, 3), date(2021, 1, 4))]["attempts"] == 2
+    assert all(window["rows"] == 2 for window in state.values())
+
+
+def test_backfill_verifies_row_counts(monkeypatch, tmp_path):
+    responses = {date(2021, 1, 1): _response(48), date(2021, 1, 2): _response(40)}
+    monkeypatch.setattr(
+        NgEso, "query", lambda self, **kwargs: responses[kwargs["start_date"]]
+    )
+
+    job = BackfillJob(
+        NgEso("historic-demand-data-2021"),
+        date_col="SETTLEMENT_DATE",
+        start_date=date(2021, 1, 1),
+        end_date=date(2021, 1, 2),
+        state_path=str(tmp_path / "state.db"),
+        window_days=1,
+        expected_rows=lambda start, end: 48,
+        max_attempts=1,
+    )
+    job.run()
+
+    assert job.failed_windows() == [(date(2021, 1, 2), date(2021, 1, 3))]
+    error = job.state()[(date(2021, 1, 2), date(2021, 1, 3))]["error"]
+    assert error == "expected 48 rows, got 40"
+
+    job.reset_failed()
+    assert job.pending_windows() == [(date(2021, 1, 2), date(2021, 1, 3))]
+
+
+def test_backfill_fails_truncated_windows(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        NgEso, "query", lambda self, **kwargs: _response(5, truncated=True)
+    )
+
+    job = BackfillJob(
+        NgEso("dc-results-summary"),
+        date_col="EFA Date",
+        start_date=date(2021, 9, 16),
+        end_date=date(2021, 9, 16),
+        state_path=str(tmp_path / "state.db"),
+    )
+    job.run()
+
+    state = job.state()[(date(2021, 9, 16), date(2021, 9, 17))]
+    assert state["status"] == "failed"
+    assert "truncated" in state["error"]
+
+
+def test_backfill_records_api_errors(monkeypatch, tmp_path):
+    error = {"success": False, "error": {"message": "column does not exist"}}
+    monkeypatch.setattr(
+        NgEso, "query", lambda self, **kwargs: json.dumps(error).encode()
+    )
+
+    job = BackfillJob(
+        NgEso("dc-results-summary"),
+        date_col="EFA Date",
+        start_date=date(2021, 9, 16),
+        end_date=date(2021, 9, 16),
+        state_path=str(tmp_path / "state.db"),
+        max_attempts=2,
+    )
+    job.run()
+    job.run()
+
+    state = job.state()[(date(2021, 9, 16), date(2021, 9, 17))]
+    assert state["status"] == "failed"
+    assert state["attempts"] == 2
+    assert "column does not exist" in state["error"]
+    assert job.pending_windows() == []
+
+
+def test_backfill_records_unexpected_errors(monkeypatch, tmp_path):
+    def query(self, **kwargs):
+        raise AttributeError("'NoneType' object has no attribute 'get'")
+
+    monkeypatch.setattr(NgEso, "query", query)
+
+    job = BackfillJob(
+        NgEso("dc-results-summary"),
+        date_col="EFA Date",
+        start_date=date(2021, 9, 16),
+        end_date=date(2021, 9, 16),
+        state_path=str(tmp_path / "state.db"),
+    )
+    job.run()
+
+    assert job.state()[(date(2021, 9, 16), date(2021, 9, 17))]["attempts"] == 1
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from pyngeso.changes import ChangeTracker, records_digest
+
+
+def _response(records) -> bytes:
+    return json.dumps({"success": True, "result": {"records": records}}).encode()
+
+
+def _order(order_id: str, volume: float, _id: int = 1) -> dict:
+    return {"_id": _id, "orderId": order_id, "volume": volume}
+
+
+def test_diff_reports_added_changed_removed():
+    tracker = ChangeTracker(primary_key=["orderId"])
+
+    first = tracker.diff(_response([_order("a", 1.0), _order("b", 2.0)]), "2024-03-15")
+    assert [r["orderId"] for r in first.added] == ["a", "b"]
+
+    second = tracker.diff(_response([_order("a", 1.5), _order("c", 3.0)]), "2024-03-15")
+    assert [r["orderId"] for r in second.added] == ["c"]
+    assert [r["volume"] for r in second.changed] == [1.5]
+    assert second.removed == [("b",)]
+
+
+def test_diff_ignores_unchanged_responses_and_internal_ids():
+    tracker = ChangeTracker(primary_key=["orderId"])
+    tracker.diff(_response([_order("a", 1.0, _id=1)]))
+
+    diff = tracker.diff(_response([_order("a", 1.0, _id=99)]))
+    assert not diff.has_changes
+
+
+def test_diff_tracks_windows_independently():
+    tracker = ChangeTracker(primary_key=["orderId"])
+    tracker.diff(_response([_order("a", 1.0)]), "2024-03-15")
+
+    diff = tracker.diff(_response([_order("a", 1.0)]), "2024-03-16")
+    assert len(diff.added) == 1
+
+    tracker.forget("2024-03-15")
+    assert len(tracker.diff(_response([_order("a", 1.0)]), "2024-03-15").added) == 1
+
+
+def test_diff_rejects_duplicate_keys():
+    tracker = ChangeTracker(primary_key=["orderId"])
+    with pytest.raises(ValueError):
+        tracker.diff(_response([_order("a", 1.0), _order("a", 2.0)]))
+
+
+def test_records_digest_ignores_response_metadata():
+    records = [_order("a", 1.0)]
+    first = json.dumps({"help": "x", "result": {"records": records, "sql": "1"}})
+    second = json.dumps({"help": "y", "result": {"records": records, "sql": "2"}})
+
+    assert records_digest(first.encode()) == records_digest(second.encode())
+
+
+def test_records_digest_ignores_internal_ids():
+    first = _response([_order("a", 1.0, _id=1)])
+    second = _response([_order("a", 1.0, _id=99)])
+
+    assert records_digest(first) == records_digest(second)
+    assert records_digest(first, ignore=()) != records_digest(second, ignore=())
+
+
+def test_null_result_has_no_records():
+    content = json.dumps({"success": False, "result": None}).encode()
+
+    assert records_digest(content) == records_digest(_response([]))
+    assert not ChangeTracker(primary_key=["orderId"]).diff(content).has_changes
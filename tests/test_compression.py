@@ -0,0 +1,93 @@
+import gzip
+from datetime import date
+
+import pytest
+import requests
+
+from pyngeso import NgEso
+from pyngeso.backfill import file_sink
+from pyngeso.compression import open_compressed, read_compressed, write_compressed
+
+
+class _Download:
+    status_code = 200
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def iter_content(self, chunk_size):
+        for chunk in self.chunks:
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+
+@pytest.mark.parametrize("suffix", [".json", ".json.gz"])
+def test_compressed_round_trip(tmp_path, suffix):
+    path = str(tmp_path / f"payload{suffix}")
+    content = b'{"success": true}' * 100
+    write_compressed(path, content)
+
+    assert read_compressed(path) == content
+
+
+def test_zstd_round_trip(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    path = str(tmp_path / "payload.json.zst")
+    content = b'{"success": true}' * 100
+    write_compressed(path, content)
+
+    assert read_compressed(path) == content
+    with open(path, "rb") as f:
+        assert zstandard.ZstdDecompressor().stream_reader(f).read() == content
+
+
+def test_gzip_suffix_is_compressed(tmp_path):
+    path = str(tmp_path / "payload.csv.gz")
+    with open_compressed(path, "wt", newline="") as f:
+        f.write("a,b\n1,2\n" * 100)
+
+    with gzip.open(path, "rt") as f:
+        assert f.readline() == "a,b\n"
+    assert (tmp_path / "payload.csv.gz").stat().st_size < 800
+
+
+def test_backfill_file_sink(tmp_path):
+    sink = file_sink(str(tmp_path / "out"), "dc-results-summary")
+    sink(date(2021, 1, 1), date(2021, 1, 7), b"first")
+    sink(date(2021, 1, 1), date(2021, 1, 7), b"retried")
+    # jobs of other resources can share the directory
+    file_sink(str(tmp_path / "out"), "dc-dr-dm-linear-orders")(
+        date(2021, 1, 1), date(2021, 1, 7), b"other"
+    )
+
+    files = sorted(f.name for f in (tmp_path / "out").iterdir())
+    assert files == [
+        "dc-dr-dm-linear-orders_20210101_20210107.json.gz",
+        "dc-results-summary_20210101_20210107.json.gz",
+    ]
+    path = str(tmp_path / "out" / files[1])
+    assert read_compressed(path) == b"retried"
+
+
+def test_save_file_is_atomic(monkeypatch, tmp_path):
+    path = str(tmp_path / "df_fuel_ckan.csv.gz")
+    client = NgEso("historic-generation-mix", "file")
+
+    chunks = [b"DATETIME,GAS\n", requests.exceptions.ChunkedEncodingError()]
+    monkeypatch.setattr(requests, "get", lambda *args, **kwargs: _Download(chunks))
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        client.save_file(path)
+    assert list(tmp_path.iterdir()) == []
+
+    chunks = [b"DATETIME,GAS\n", b"2009-01-01 00:00:00,1\n"]
+    monkeypatch.setattr(requests, "get", lambda *args, **kwargs: _Download(chunks))
+    assert client.save_file(path) == path
+    assert [p.name for p in tmp_path.iterdir()] == ["df_fuel_ckan.csv.gz"]
+    assert read_compressed(path) == b"".join(chunks)
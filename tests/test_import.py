@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+from typing import Dict
+
+# cumulative time `import pyngeso` may take, in microseconds
+IMPORT_BUDGET_US = 50_000
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _import_times(statement: str) -> Dict[str, int]:
+    """Cumulative import time of every module imported by `statement`"""
+    p = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in p.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def test_import_does_not_load_http_stack():
+    modules = _import_times("import pyngeso")
+
+    assert "requests" not in modules
+    assert "pyngeso.resources" not in modules
+
+
+def test_client_does_not_load_http_stack_until_querying():
+    modules = _import_times(
+        "from pyngeso import NgEso; NgEso('historic-day-ahead-demand-forecast')"
+    )
+
+    assert "pyngeso.resources" in modules
+    assert "requests" not in modules
+
+
+def test_import_time_budget():
+    modules = _import_times("import pyngeso")
+
+    assert modules["pyngeso"] < IMPORT_BUDGET_US
@@ -0,0 +1,100 @@
+import json
+from datetime import date, datetime
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pyngeso import NgEso  # noqa: E402
+from pyngeso.join import Source, fetch_aligned  # noqa: E402
+
+responses = {
+    "historic-demand-data-2021": [
+        {"SETTLEMENT_DATE": "2021-03-28T00:00:00", "SETTLEMENT_PERIOD": p, "ND": p}
+        for p in (3, 1, 2)
+    ],
+    "carbon-intensity-forecast": [
+        {"datetime": "2021-03-28T00:30:00", "forecast": 200},
+        {"datetime": "2021-03-28T01:00:00", "forecast": None},
+        {"datetime": "2021-03-28T01:30:00", "forecast": 190},
+    ],
+}
+
+
+@pytest.fixture
+def query(monkeypatch):
+    queries = {}
+
+    def query(self, **kwargs):
+        queries[self.resource] = kwargs
+        records = responses[self.resource]
+        return json.dumps({"success": True, "result": {"records": records}}).encode()
+
+    monkeypatch.setattr(NgEso, "query", query)
+    return queries
+
+
+sources = {
+    "demand": Source(
+        NgEso("historic-demand-data-2021"),
+        "SETTLEMENT_DATE",
+        ["ND"],
+        period_col="SETTLEMENT_PERIOD",
+    ),
+    "carbon": Source(NgEso("carbon-intensity-forecast"), "datetime", ["forecast"]),
+}
+
+
+def test_fetch_aligned_inner(query):
+    aligned = fetch_aligned(sources, date(2021, 3, 28), date(2021, 3, 28))
+
+    assert query["historic-demand-data-2021"]["fields"] == [
+        "SETTLEMENT_DATE",
+        "SETTLEMENT_PERIOD",
+        "ND",
+    ]
+    # clocks go forward at 01:00 UTC, period 3 starts at 01:00 UTC
+    assert aligned.start.astype(str).tolist() == [
+        "2021-03-28T00:30:00",
+        "2021-03-28T01:00:00",
+    ]
+    assert aligned.settlement_period.tolist() == [2, 3]
+    assert aligned.values["demand"]["ND"].tolist() == [2.0, 3.0]
+    assert aligned.values["carbon"]["forecast"][0] == 200.0
+    assert np.isnan(aligned.values["carbon"]["forecast"][1])
+
+
+def test_fetch_aligned_queries_the_same_periods(query):
+    fetch_aligned(sources, date(2021, 3, 28), date(2021, 3, 28))
+
+    demand = query["historic-demand-data-2021"]
+    assert demand["period_col"] == "SETTLEMENT_PERIOD"
+    assert (demand["start_date"], demand["start_period"]) == (date(2021, 3, 28), 1)
+    assert (demand["end_date"], demand["end_period"]) == (date(2021, 3, 28), 46)
+    # the settlement day ends at 23:00 UTC once clocks have gone forward
+    carbon = query["carbon-intensity-forecast"]
+    assert carbon["start_date"] == datetime(2021, 3, 28)
+    assert carbon["filters"] == ["\"datetime\" < '2021-03-28T23:00:00'::timestamp"]
+
+    fetch_aligned(sources, datetime(2021, 7, 1, 10), datetime(2021, 7, 1, 12))
+    demand = query["historic-demand-data-2021"]
+    assert (demand["start_period"], demand["end_period"]) == (23, 26)
+    assert query["carbon-intensity-forecast"]["start_date"] == datetime(2021, 7, 1, 10)
+
+
+def test_fetch_aligned_outer(query):
+    aligned = fetch_aligned(sources, date(2021, 3, 28), date(2021, 3, 28), how="outer")
+
+    assert aligned.settlement_period.tolist() == [1, 2, 3, 4]
+    assert np.isnan(aligned.values["demand"]["ND"][3])
+    assert np.isnan(aligned.values["carbon"]["forecast"][0])
+
+
+def test_fetch_aligned_rejects_duplicate_periods(query, monkeypatch):
+    monkeypatch.setitem(
+        responses,
+        "carbon-intensity-forecast",
+        [{"datetime": "2021-03-28T00:30:00", "forecast": 1}] * 2,
+    )
+    with pytest.raises(ValueError):
+        fetch_aligned(sources, date(2021, 3, 28), date(2021, 3, 28))
@@ -0,0 +1,107 @@
+import csv
+import json
+import os
+from datetime import date
+
+import pytest
+
+from pyngeso import NgEso
+from pyngeso.exceptions import IncompleteFetch, UnsuccessfulRequest
+from pyngeso.pipeline import fetch_and_convert
+
+
+def test_fetch_and_convert(monkeypatch, tmp_path):
+    queries = []
+
+    def query(self, **kwargs):
+        queries.append(self.construct_sql(**kwargs))
+        day = kwargs["start_date"].isoformat()
+        result = {
+            "fields": [{"id": "SETTLEMENT_DATE"}, {"id": "ND"}],
+            "records": [{"ND": i, "SETTLEMENT_DATE": day} for i in range(3)],
+        }
+        return json.dumps({"success": True, "result": result}).encode()
+
+    monkeypatch.setattr(NgEso, "query", query)
+    converted = fetch_and_convert(
+        NgEso("historic-demand-data-2021"),
+        date_col="SETTLEMENT_DATE",
+        start_date=date(2021, 1, 1),
+        end_date=date(2021, 1, 3),
+        output_dir=str(tmp_path),
+        window_days=2,
+        max_processes=2,
+    )
+
+    assert [window for window, _, _ in converted] == [
+        (date(2021, 1, 1), date(2021, 1, 3)),
+        (date(2021, 1, 3), date(2021, 1, 4)),
+    ]
+    # windows on a timestamp column end where the next window starts
+    assert sorted(sql.split(" where ")[1] for sql in queries) == [
+        "\"SETTLEMENT_DATE\" >= '2021-01-01'::timestamp "
+        "and \"SETTLEMENT_DATE\" < '2021-01-03'::timestamp ",
+        "\"SETTLEMENT_DATE\" >= '2021-01-03'::timestamp "
+        "and \"SETTLEMENT_DATE\" < '2021-01-04'::timestamp ",
+    ]
+    assert [n_rows for _, _, n_rows in converted] == [3, 3]
+    # raw responses handed over to the workers are cleaned up
+    assert sorted(p.suffix for p in tmp_path.iterdir()) == [".csv", ".csv"]
+
+    with open(converted[1][1], newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["SETTLEMENT_DATE", "ND"]
+    assert rows[1] == ["2021-01-03", "0"]
+
+
+def test_fetch_and_convert_timestamp_windows(monkeypatch, tmp_path):
+    queries = []
+
+    def query(self, **kwargs):
+        queries.append(self.construct_sql(**kwargs))
+        return json.dumps({"success": True, "result": {"records": []}}).encode()
+
+    monkeypatch.setattr(NgEso, "query", query)
+    fetch_and_convert(
+        NgEso("historic-frequency-data-jan22"),
+        date_col="dtm",
+        start_date=date(2022, 1, 1),
+        end_date=date(2022, 1, 1),
+        output_dir=str(tmp_path),
+        window_days=1,
+        max_processes=1,
+    )
+
+    assert queries[0].endswith(
+        "where \"dtm\" >= '2022-01-01'::timestamp "
+        "and \"dtm\" < '2022-01-02'::timestamp "
+    )
+
+
+def test_fetch_and_convert_keeps_converted_windows(monkeypatch, tmp_path):
+    def query(self, **kwargs):
+        if kwargs["start_date"] == date(2021, 1, 2):
+            raise UnsuccessfulRequest("status_code=500:b''")
+        result = {"records": [{"ND": 1}]}
+        return json.dumps({"success": True, "result": result}).encode()
+
+    monkeypatch.setattr(NgEso, "query", query)
+    with pytest.raises(IncompleteFetch) as e:
+        fetch_and_convert(
+            NgEso("historic-demand-data-2021"),
+            date_col="SETTLEMENT_DATE",
+            start_date=date(2021, 1, 1),
+            end_date=date(2021, 1, 4),
+            output_dir=str(tmp_path),
+            window_days=1,
+            max_threads=1,
+            max_processes=1,
+        )
+
+    assert list(e.value.failed) == [(date(2021, 1, 2), date(2021, 1, 3))]
+    assert isinstance(e.value.__cause__, UnsuccessfulRequest)
+    assert e.value.converted[0][0] == (date(2021, 1, 1), date(2021, 1, 2))
+    # no raw responses are left behind, only the converted windows
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == sorted(os.path.basename(path) for _, path, _ in e.value.converted)
+    assert all(name.endswith(".csv") for name in files)
@@ -0,0 +1,107 @@
+import json
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pytest
+import requests
+
+from pyngeso import NgEso
+from pyngeso.profiling import Profiler, phase
+
+
+class FakeResponse:
+    status_code = 200
+    content = json.dumps({"success": True, "result": {"records": [{"ND": 1}]}}).encode()
+
+
+@pytest.fixture
+def fake_get(monkeypatch):
+    monkeypatch.setattr(requests, "get", lambda *args, **kwargs: FakeResponse())
+
+
+def _query():
+    client = NgEso("demand-data-update")
+    return client.query(date_col="SETTLEMENT_DATE", start_date=date(2021, 1, 1))
+
+
+def test_profile_query_phases(fake_get):
+    with NgEso.profile(track_allocations=True) as profiler:
+        _query()
+        with profiler.phase("convert"):
+            json.loads(_query())
+
+    assert set(profiler.stats) == {
+        ("query",),
+        ("query", "construct_sql"),
+        ("query", "http"),
+        ("query", "check_for_errors"),
+        ("query", "missing_data"),
+        ("convert",),
+        ("convert", "query"),
+        ("convert", "query", "construct_sql"),
+        ("convert", "query", "http"),
+        ("convert", "query", "check_for_errors"),
+        ("convert", "query", "missing_data"),
+    }
+    assert profiler.stats[("query",)].count == 1
+    assert profiler.stats[("query",)].wall >= profiler.stats[("query", "http")].wall
+    assert "check_for_errors" in profiler.report()
+
+
+@pytest.mark.skipif(
+    not hasattr(tracemalloc, "reset_peak"), reason="tracemalloc.reset_peak is 3.9+"
+)
+def test_profile_peak_memory():
+    content = json.dumps([{"ND": i, "TSD": i} for i in range(100_000)]).encode()
+    with Profiler(track_allocations=True) as profiler:
+        with profiler.phase("outer"):
+            with profiler.phase("parse"):
+                # parsed and freed within the phase
+                n_rows = len(json.loads(content))
+            with profiler.phase("small"):
+                b"x" * 1024
+
+    assert n_rows == 100_000
+    parse = profiler.stats[("outer", "parse")].peak_memory
+    assert parse > len(content)
+    assert profiler.stats[("outer",)].peak_memory >= parse
+    assert profiler.stats[("outer", "small")].peak_memory < len(content)
+    assert "peak_kb" in profiler.report()
+
+
+def test_profile_threads(fake_get):
+    with Profiler() as profiler:
+        with ThreadPoolExecutor(4) as threads:
+            list(threads.map(lambda _: _query(), range(8)))
+
+    assert profiler.stats[("query",)].count == 8
+    assert profiler.stats[("query", "http")].count == 8
+
+
+def test_collapsed_stacks_use_self_time(fake_get, tmp_path):
+    with Profiler() as profiler:
+        _query()
+
+    lines = dict(line.rsplit(" ", 1) for line in profiler.collapsed().splitlines())
+    assert set(lines) == {
+        "query",
+        "query;construct_sql",
+        "query;http",
+        "query;check_for_errors",
+        "query;missing_data",
+    }
+    total = sum(int(value) for value in lines.values())
+    assert abs(total - 1e6 * profiler.stats[("query",)].wall) <= len(lines)
+
+    profiler.dump(str(tmp_path / "query.folded"))
+    assert (tmp_path / "query.folded").read_text().startswith("query ")
+
+
+def test_phase_is_a_noop_without_profiler(fake_get):
+    with phase("anything"):
+        _query()
+
+    with Profiler() as profiler:
+        pass
+    assert profiler.stats == {}
@@ -463,3 +463,77 @@ def test_br_eac_eso_results_by_units():
     records = r_dict.get("result").get("records")
     assert isinstance(records, list)
     assert len(records) > 0
+
+
+def test_construct_sql_settlement_period_range():
+    client = NgEso("historic-demand-data-2021")
+    sql = client.construct_sql(
+        fields=["ND"],
+        date_col="SETTLEMENT_DATE",
+        start_date=date(2021, 1, 1),
+        end_date=date(2021, 1, 2),
+        period_col="SETTLEMENT_PERIOD",
+        start_period=47,
+        end_period=2,
+    )
+
+    assert sql == (
+        f'select "ND" from "{client.resource_id}" '
+        "where \"SETTLEMENT_DATE\" BETWEEN '2021-01-01'::timestamp "
+        "and '2021-01-02'::timestamp "
+        "and (\"SETTLEMENT_DATE\" > '2021-01-01'::timestamp "
+        'or "SETTLEMENT_PERIOD" >= 47) '
+        "and (\"SETTLEMENT_DATE\" < '2021-01-02'::timestamp "
+        'or "SETTLEMENT_PERIOD" <= 2)  '
+    )
+
+
+def test_construct_sql_settlement_period_start_only():
+    client = NgEso("demand-data-update")
+    sql = client.construct_sql(
+        date_col="SETTLEMENT_DATE",
+        start_date=date(2021, 1, 1),
+        period_col="SETTLEMENT_PERIOD",
+        start_period=17,
+        filters=["\"FORECAST_ACTUAL_INDICATOR\" = 'A'"],
+    )
+
+    assert sql.endswith(
+        "where \"SETTLEMENT_DATE\" >= '2021-01-01'::timestamp "
+        "and (\"SETTLEMENT_DATE\" > '2021-01-01'::timestamp "
+        'or "SETTLEMENT_PERIOD" >= 17) '
+        "and \"FORECAST_ACTUAL_INDICATOR\" = 'A' "
+    )
+
+
+def test_construct_sql_settlement_period_end_only():
+    client = NgEso("demand-data-update")
+    sql = client.construct_sql(
+        date_col="SETTLEMENT_DATE",
+        end_date=date(2021, 1, 2),
+        period_col="SETTLEMENT_PERIOD",
+        end_period=2,
+    )
+
+    assert sql.endswith(
+        "where \"SETTLEMENT_DATE\" <= '2021-01-02'::timestamp "
+        "and (\"SETTLEMENT_DATE\" < '2021-01-02'::timestamp "
+        'or "SETTLEMENT_PERIOD" <= 2)  '
+    )
+
+
+def test_construct_sql_settlement_period_validation():
+    client = NgEso("demand-data-update")
+    with pytest.raises(ValueError):
+        client.construct_sql(
+            date_col="SETTLEMENT_DATE", end_date=date(2021, 1, 1), end_period=3
+        )
+    with pytest.raises(ValueError):
+        client.construct_sql(period_col="SETTLEMENT_PERIOD", start_period=3)
+    with pytest.raises(AssertionError):
+        client.construct_sql(
+            date_col="SETTLEMENT_DATE",
+            start_date=date(2021, 1, 1),
+            period_col="SETTLEMENT_PERIOD",
+            start_period=51,
+        )
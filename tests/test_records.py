@@ -0,0 +1,107 @@
+import json
+import sys
+import tracemalloc
+from datetime import datetime
+
+from pyngeso import NgEso
+from pyngeso.records import RecordView, converters, record_type
+
+fields = [
+    {"id": "_id", "type": "int"},
+    {"id": "deliveryStart", "type": "timestamp"},
+    {"id": "EFA Date", "type": "date"},
+    {"id": "unitName", "type": "text"},
+    {"id": "executedVolume", "type": "numeric"},
+]
+
+
+def _response(n_rows: int) -> bytes:
+    records = [
+        {
+            "_id": i,
+            "deliveryStart": "2024-03-14T23:00:00",
+            "EFA Date": "2024-03-15",
+            "unitName": f"unit-{i}",
+            "executedVolume": "1.5" if i else None,
+        }
+        for i in range(n_rows)
+    ]
+    result = {"fields": fields, "records": records}
+    return json.dumps({"success": True, "result": result}).encode()
+
+
+def test_record_view_converts_types():
+    view = RecordView(_response(3), "br-eac-eso-results-by-units")
+
+    assert len(view) == 3
+    row = view[1]
+    assert type(row).__name__ == "BrEacEsoResultsByUnitsRecord"
+    assert row.deliveryStart == datetime(2024, 3, 14, 23)
+    assert row.EFA_Date.isoformat() == "2024-03-15"
+    assert row.executedVolume == 1.5
+    assert row.unitName == "unit-1"
+    assert view[0].executedVolume is None
+    assert [r.unitName for r in view[1:]] == ["unit-1", "unit-2"]
+    assert view.column("EFA Date")[0].isoformat() == "2024-03-15"
+
+
+def test_record_rows_are_compact():
+    content = _response(1)
+    record = json.loads(content)["result"]["records"][0]
+    row = RecordView(content)[0]
+
+    assert not hasattr(row, "__dict__")
+    assert sys.getsizeof(row) < sys.getsizeof(record)
+
+
+def test_record_types_are_cached():
+    assert record_type("dc-dr-dm-linear-orders", fields) is record_type(
+        "dc-dr-dm-linear-orders", fields
+    )
+
+
+def test_query_records(monkeypatch):
+    monkeypatch.setattr(NgEso, "query", lambda self, *args: _response(2))
+    view = NgEso("br-eac-eso-results-by-units").query_records(
+        date_col="deliveryStart", start_date=datetime(2024, 3, 14, 23)
+    )
+
+    assert [row.id for row in view] == [0, 1]
+
+
+def test_record_view_converts_once(monkeypatch):
+    calls = []
+
+    def fromisoformat(value):
+        calls.append(value)
+        return datetime.fromisoformat(value)
+
+    monkeypatch.setitem(converters, "timestamp", fromisoformat)
+    view = RecordView(_response(3))
+    assert len(calls) == 3
+
+    assert view[0].deliveryStart is view[0].deliveryStart
+    assert list(view) == view[:] == view.to_list()
+    assert view.column("deliveryStart")[0] == datetime(2024, 3, 14, 23)
+    assert len(calls) == 3
+
+
+def test_record_view_holds_values_once():
+    content = _response(10_000)
+    tracemalloc.start()
+    try:
+        records = json.loads(content)["result"]["records"]
+        records_size = tracemalloc.get_traced_memory()[0]
+        del records
+
+        start = tracemalloc.get_traced_memory()[0]
+        view = RecordView(content)
+        view_size = tracemalloc.get_traced_memory()[0] - start
+        rows = view.to_list()
+        rows_size = tracemalloc.get_traced_memory()[0] - start - view_size
+    finally:
+        tracemalloc.stop()
+
+    assert view_size < 0.6 * records_size
+    # rows are built on access rather than kept alongside the columns
+    assert rows_size >= len(rows) * sys.getsizeof(rows[0])
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pyngeso.resample import columns_from_response, find_gaps, resample  # noqa: E402
+
+
+def test_resample_aggregations():
+    timestamps = np.array(
+        ["2022-01-01T00:00:00", "2022-01-01T00:10:00", "2022-01-01T00:40:00"],
+        dtype="datetime64[s]",
+    )
+    f = [50.0, 50.2, 49.9]
+
+    series = resample(timestamps, {"f": f, "g": f}, how={"f": "max", "g": "last"})
+
+    assert series.settlement_period.tolist() == [1, 2]
+    assert series.count["f"].tolist() == [2, 1]
+    assert series.values["f"].tolist() == [50.2, 49.9]
+    assert series.values["g"].tolist() == [50.2, 49.9]
+
+    mean = resample(timestamps[::-1], {"f": f[::-1]})
+    assert mean.values["f"].tolist() == pytest.approx([50.1, 49.9])
+
+
+def test_resample_clock_change_day():
+    # one sample per minute over the day clocks go back
+    start = np.datetime64("2022-10-29T23:00:00")
+    timestamps = start + np.arange(25 * 60).astype("timedelta64[m]")
+    series = resample(timestamps, {"f": np.ones(timestamps.size)})
+
+    assert series.start.size == 50
+    assert set(series.settlement_date.astype(str)) == {"2022-10-30"}
+    assert series.settlement_period.tolist() == list(range(1, 51))
+    assert (series.count["f"] == 30).all()
+
+
+def test_resample_gaps_and_fill():
+    timestamps = np.array(
+        ["2022-01-01T00:15:00", "2022-01-01T01:45:00"], dtype="datetime64[s]"
+    )
+    start, end = "2022-01-01T00:00:00", "2022-01-01T03:00:00"
+
+    series = resample(timestamps, {"v": [1.0, 4.0]}, start=start, end=end)
+    assert series.missing["v"].tolist() == [False, True, True, False, True, True]
+    assert [(str(a), str(b)) for a, b in find_gaps(series)] == [
+        ("2022-01-01T00:30:00", "2022-01-01T01:30:00"),
+        ("2022-01-01T02:00:00", "2022-01-01T03:00:00"),
+    ]
+
+    ffill = resample(timestamps, {"v": [1.0, 4.0]}, start=start, end=end, fill="ffill")
+    assert ffill.values["v"].tolist() == [1.0, 1.0, 1.0, 4.0, 4.0, 4.0]
+
+    interpolated = resample(
+        timestamps, {"v": [1.0, 4.0]}, start=start, end=end, fill="interpolate"
+    )
+    assert interpolated.values["v"][:4].tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert np.isnan(interpolated.values["v"][4:]).all()
+
+
+def test_resample_skips_nan_samples():
+    timestamps = np.array(
+        ["2022-01-01T00:00:00", "2022-01-01T00:10:00", "2022-01-01T00:40:00"],
+        dtype="datetime64[s]",
+    )
+    columns = {"f": [50.0, np.nan, np.nan], "g": [1.0, 2.0, 3.0]}
+
+    series = resample(timestamps, columns, how={"g": "min"})
+    assert series.count["f"].tolist() == [1, 0]
+    assert series.count["g"].tolist() == [2, 1]
+    assert series.values["f"][0] == 50.0
+    assert np.isnan(series.values["f"][1])
+    assert series.values["g"].tolist() == [1.0, 3.0]
+
+    assert [str(a) for a, _ in find_gaps(series, "f")] == ["2022-01-01T00:30:00"]
+    assert find_gaps(series) == []
+
+    ffill = resample(timestamps, columns, fill="ffill")
+    assert ffill.values["f"].tolist() == [50.0, 50.0]
+
+
+def test_resample_validates_arguments():
+    timestamps = np.array(["2022-01-01T00:00:00"], dtype="datetime64[s]")
+    with pytest.raises(ValueError):
+        resample(timestamps, {"f": [50.0]}, fill="bfill")
+    with pytest.raises(ValueError):
+        resample(timestamps, {"f": [50.0]}, how={"f": "median"})
+    with pytest.raises(ValueError, match="end should be after start"):
+        resample(
+            timestamps, {"f": [50.0]}, start="2022-01-01T00:20", end="2022-01-01T00:10"
+        )
+    with pytest.raises(ValueError):
+        resample(timestamps, {"f": [50.0]}, start="2022-01-01T01:00")
+    with pytest.raises(ValueError):
+        resample(timestamps, {"f": [50.0]}, end="2021-12-31T23:00")
+
+
+def test_columns_from_response():
+    records = [
+        {"dtm": "2022-01-01T00:00:00", "f": 50.01},
+        {"dtm": "2022-01-01T00:00:01", "f": None},
+    ]
+    content = json.dumps({"result": {"records": records}}).encode()
+
+    timestamps, columns = columns_from_response(content, "dtm", ["f"])
+
+    assert timestamps.dtype == np.dtype("datetime64[s]")
+    assert columns["f"][0] == 50.01
+    assert np.isnan(columns["f"][1])
+
+    null_result = json.dumps({"success": False, "result": None}).encode()
+    timestamps, columns = columns_from_response(null_result, "dtm", ["f"])
+    assert timestamps.size == 0 and columns["f"].size == 0
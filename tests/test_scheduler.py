@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+from pyngeso import NgEso
+from pyngeso.exceptions import UnsuccessfulRequest
+from pyngeso.scheduler import PollingScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _response(value: int) -> bytes:
+    records = [{"datetime": "2022-01-01T00:00:00", "forecast": value}]
+    return json.dumps({"success": True, "result": {"records": records}}).encode()
+
+
+def test_scheduler_notifies_only_on_new_data(monkeypatch):
+    published = {"value": 1}
+    monkeypatch.setattr(
+        NgEso, "query", lambda self, **kwargs: _response(published["value"])
+    )
+    clock = FakeClock()
+    notified = []
+
+    scheduler = PollingScheduler(clock=clock)
+    scheduler.add(
+        "carbon",
+        NgEso("carbon-intensity-forecast"),
+        {"date_col": "datetime"},
+        callback=lambda name, content: notified.append(json.loads(content)),
+        interval=100,
+        min_interval=10,
+        max_interval=1000,
+    )
+
+    assert scheduler.run_pending() == ["carbon"]
+    assert scheduler.next_due() == 100
+
+    # unchanged polls back off exponentially
+    clock.now = 100
+    assert scheduler.run_pending() == []
+    assert scheduler.next_due() == 300
+    clock.now = 300
+    scheduler.run_pending()
+    assert scheduler.next_due() == 700
+
+    published["value"] = 2
+    clock.now = 700
+    assert scheduler.run_pending() == ["carbon"]
+    assert len(notified) == 2
+    assert notified[-1]["result"]["records"][0]["forecast"] == 2
+
+
+def test_scheduler_learns_publication_cadence(monkeypatch):
+    published = {"value": 0}
+    monkeypatch.setattr(
+        NgEso, "query", lambda self, **kwargs: _response(published["value"])
+    )
+    clock = FakeClock()
+
+    scheduler = PollingScheduler(clock=clock)
+    scheduler.add(
+        "wind",
+        NgEso("day-ahead-wind-forecast"),
+        lambda: {"date_col": "Date"},
+        interval=100,
+        min_interval=10,
+        max_interval=1000,
+    )
+
+    # the first fetch is not a publication
+    assert scheduler.run_pending() == ["wind"]
+    for publication in range(1, 4):
+        clock.now = 900 + (publication - 1) * 1800
+        published["value"] = publication
+        assert scheduler.run_pending() == ["wind"]
+
+    # the next poll is just before the learned 1800s cadence, then closely around it
+    assert scheduler.next_due() == 4500 + 1790
+    clock.now = 6290
+    assert scheduler.run_pending() == []
+    assert scheduler.next_due() == 6300
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        UnsuccessfulRequest("status_code=503:b''"),
+        AttributeError("'NoneType' object has no attribute 'get'"),
+    ],
+)
+def test_scheduler_backs_off_on_errors(monkeypatch, error):
+    def query(self, **kwargs):
+        raise error
+
+    monkeypatch.setattr(NgEso, "query", query)
+    clock = FakeClock()
+
+    scheduler = PollingScheduler(clock=clock)
+    scheduler.add(
+        "dc",
+        NgEso("dc-volume-forecast"),
+        {},
+        interval=100,
+        min_interval=10,
+    )
+
+    assert scheduler.run_pending() == []
+    assert scheduler.next_due() == 200
+
+
+def test_scheduler_isolates_failing_subscribers(monkeypatch):
+    monkeypatch.setattr(NgEso, "query", lambda self, **kwargs: _response(1))
+    notified = []
+
+    def failing(name, content):
+        raise RuntimeError("subscriber failed")
+
+    scheduler = PollingScheduler(clock=FakeClock())
+    for name in ("carbon", "wind"):
+        scheduler.add(name, NgEso("carbon-intensity-forecast"), {}, callback=failing)
+        scheduler.subscribe(name, lambda name, content: notified.append(name))
+
+    assert scheduler.run_pending() == ["carbon", "wind"]
+    assert notified == ["carbon", "wind"]
@@ -0,0 +1,75 @@
+from datetime import date
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pyngeso.settlement import (  # noqa: E402
+    clock_change_days,
+    periods_in_day,
+    settlement_period_start,
+    settlement_window,
+    to_settlement_periods,
+)
+
+
+def test_clock_change_days():
+    forward, back = clock_change_days([2022, 2023, 2024])
+
+    assert forward.astype(str).tolist() == ["2022-03-27", "2023-03-26", "2024-03-31"]
+    assert back.astype(str).tolist() == ["2022-10-30", "2023-10-29", "2024-10-27"]
+
+
+def test_periods_in_day():
+    days = ["2022-03-27", "2022-06-01", "2022-10-30"]
+
+    assert periods_in_day(days).tolist() == [46, 48, 50]
+
+
+@pytest.mark.parametrize(
+    "timestamp, settlement_date, settlement_period",
+    [
+        ("2022-01-15T00:00:00", "2022-01-15", 1),
+        ("2022-01-15T23:59:59", "2022-01-15", 48),
+        # clocks go forward at 01:00 UTC
+        ("2022-03-27T00:59:59", "2022-03-27", 2),
+        ("2022-03-27T01:00:00", "2022-03-27", 3),
+        ("2022-03-27T22:30:00", "2022-03-27", 46),
+        ("2022-06-01T22:59:59", "2022-06-01", 48),
+        ("2022-06-01T23:00:00", "2022-06-02", 1),
+        # clocks go back at 01:00 UTC, local midnight was 23:00 UTC
+        ("2022-10-29T23:00:00", "2022-10-30", 1),
+        ("2022-10-30T01:00:00", "2022-10-30", 5),
+        ("2022-10-30T23:30:00", "2022-10-30", 50),
+    ],
+)
+def test_to_settlement_periods(timestamp, settlement_date, settlement_period):
+    dates, periods = to_settlement_periods([timestamp])
+
+    assert str(dates[0]) == settlement_date
+    assert periods[0] == settlement_period
+
+
+def test_settlement_period_start_round_trip():
+    timestamps = np.datetime64("2022-03-26T00:00:00") + np.arange(
+        0, 4 * 24 * 60, 30
+    ).astype("timedelta64[m]")
+    dates, periods = to_settlement_periods(timestamps)
+
+    assert (settlement_period_start(dates, periods) == timestamps).all()
+
+
+def test_settlement_period_start_rejects_missing_periods():
+    with pytest.raises(ValueError):
+        settlement_period_start(["2022-03-27"], [47])
+
+
+def test_settlement_window():
+    window = settlement_window("2022-10-29T22:00:00", "2022-10-30T02:00:00")
+
+    assert window == {
+        "start_date": date(2022, 10, 29),
+        "start_period": 47,
+        "end_date": date(2022, 10, 30),
+        "end_period": 6,
+    }